@@ -3,44 +3,54 @@
 # Date: 8 June 2021
 # File: tictactoe\cmd.py
 
-from copy import copy
-from pickle import load
+from argparse import ArgumentParser
 from typing import Optional
 
 import random
+import sys
 
+from tictactoe import protocol
+from tictactoe.core import analysis
+from tictactoe.core.algorithms import level_slots
+from tictactoe.core.bitboard import BitBoard
 from tictactoe.core.board import Board, Combination
 from tictactoe.core.enums import *
 from tictactoe.core.cpu_database_builder import build
+from tictactoe.core.database import Database, get_database
+from tictactoe.core.engine import AlphaBetaEngine
+from tictactoe.core.gomoku import GomokuBoard, GomokuEngine
+from tictactoe.core.mcts import MCTSEngine
+from tictactoe.core.mnk import VARIANTS, MNKBoard
+from tictactoe.core.qubic import QubicBoard, QubicEngine
+from tictactoe.core.tablebase import Tablebase, get_tablebase
+from tictactoe.core.ultimate import UltimateBoard
 
 
 class Game(object):
     """
     Class for one command-line game of tic-tac-toe.
     """
-    __slots__ = "board", "database"
+    __slots__ = "board", "database", "level", "assignment"
     
-    def __new__(cls):
+    def __new__(cls, level: Level = Level.Impossible):
         self = object.__new__(cls)
-        self.board: Board = Board()
-        self.database: dict = {}
+        self.board: BitBoard = BitBoard()
+        self.database: Optional[Database] = None
+        self.level = level
+        self.assignment: Optional[Assignment] = None
         return self
     
+    def __init__(self, level: Level = Level.Impossible):
+        pass
+    
     def prepare(self, user_symbol: Symbol):
         """
         Assign the provided symbol to the user, the other to the computer.
-        Load the appropriate database for the computer's use.
+        Get the database for the computer's use.
+        The database is loaded once per process and shared by later games.
         """
-        import os
-        os.chdir(os.getcwd() + "\\gui")
-        self.build_cpu_database()
-        
-        Player.User.assign(user_symbol)
-        if Player.Computer.symbol == Symbol.X:
-            file = open("cpudata1.txt", "rb")
-        else:
-            file = open("cpudata2.txt", "rb")
-        self.database = load(file)
+        self.assignment = Assignment(user_symbol)
+        self.database = get_database()
         
     def build_cpu_database(self) -> None:
         """
@@ -60,23 +70,27 @@ class Game(object):
         else:
             print("The game is a draw.")
     
-    def get_user_input(self) -> int: 
+    def get_user_input(self) -> Optional[int]: 
         """Return the index requested by the user.
         
         The index represents the position on the board
         the user desires to go and it should be an integer,
-        between 0 and 8, inclusive.
+        between 0 and the last slot (8 on a 3x3 board), inclusive. 
+        None is returned if the user asks to undo their last move instead.
         """
+        last = len(self.board) - 1
         invalid = True
         data = None
         while invalid:
-            data = input("Enter a slot between 0 and 8: ")
+            data = input(f"Enter a slot between 0 and {last} (or U to undo): ")
+            if data.strip().lower() == "u":
+                return None
             try:
                 data = int(data)
-                if 0 <= data <= 8:
+                if 0 <= data <= last:
                     invalid = False
                 else:
-                    print("The slot must be between 0 and 8, inclusive")
+                    print(f"The slot must be between 0 and {last}, inclusive")
             except ValueError:
                 print("The slot must be an integer")
         return data
@@ -97,6 +111,12 @@ class Game(object):
                 self.prepare(Symbol.O)
             else: 
                 data = None
+        self.output_slots()
+    
+    def output_slots(self) -> None:
+        """
+        Output the slot numbers to the user.
+        """
         print(Board(range(9)))
     
     def output(self) -> None:
@@ -113,24 +133,39 @@ class Game(object):
         This function will return True if the write was sucessful,
         False otherwise.
         """
-        if isinstance(index, int) and 0 <= index < 9:
+        if isinstance(index, int) and 0 <= index < len(self.board):
             symbol = self.board[index]
             if symbol is None:
-                self.board[index] = Player.User.symbol
+                self.board.push(index)
                 return True
         return False
     
+    def take_back(self) -> bool:
+        """
+        Take back the user's last move, and the computer's reply to it.
+        
+        This function will return True if there was a move to take back,
+        False otherwise.
+        """
+        return bool(self.board.take_back(self.assignment.user))
+    
     def user_turn(self) -> None:
         """
         Define one user turn. 
         
         Request an index from the user and attempt to write the user's symbol
         to the index on the tic-tac-toe board. Keep requesting an index from the 
-        user until a write is sucessful. 
+        user until a write is sucessful. The user may take back moves meanwhile.
         """
         successful = False
         while not successful:
             index = self.get_user_input()
+            if index is None:
+                if self.take_back():
+                    self.output()
+                else:
+                    print("There is no move to undo")
+                continue
             successful = self.write_user_input(index)
             
     
@@ -138,31 +173,18 @@ class Game(object):
         """
         Define one computer turn.
         
-        Iterate over all the possible moves. Choose the best one. 
-        If multiple moves are randomly best, randomly choose one of those moves.
+        At Level.Impossible, look up the best moves of the board in the database: 
+        those winning the fastest, drawing, or losing the slowest. At lower levels, 
+        like the visual game, sometimes play the tactical moves instead: 
+        winning at once, else blocking the user's win, else any. 
+        If multiple moves are equally good, randomly choose one of those moves.
         
         Write the computer's symbol to its chosen index.
         """
-        # Get the slot
-        best_outcome = Outcome.Loss
-        best_slots = []
-        slots = self.board.available_slots()
-        
-        for slot in slots:
-            board_copy = copy(self.board)
-            board_copy[slot] = Player.Computer.symbol
-            outcome = self.database[repr(board_copy)]
-            # Note: Win < Draw < Loss. See enums.Outcomes
-            if outcome.value < best_outcome.value:
-                best_outcome = outcome
-                best_slots = [slot]
-            elif outcome.value == best_outcome.value:
-                best_slots.append(slot)
-                
-        slot = random.choice(best_slots)
+        slot = random.choice(level_slots(self.board, self.assignment.computer, self.level, self.database))
         
         # Write to the slot
-        self.board[slot] = Player.Computer.symbol
+        self.board.push(slot)
         
     def play(self) -> tuple[Optional[Player], Optional[Combination]]:
         """
@@ -173,7 +195,7 @@ class Game(object):
         check if there is a winner. If there is, return the winner and the winning combination. 
         In case of a draw, return (None, None).
         """
-        if Player.User.symbol is Symbol.X:
+        if self.assignment.user is Symbol.X:
             self.output()
             self.user_turn()
             self.output()
@@ -184,7 +206,7 @@ class Game(object):
             self.computer_turn()
             self.output()
             
-            winner, combo = self.board.winner()
+            winner, combo = self.board.winner(self.assignment)
             if winner is not None:
                 return (winner, combo)
             
@@ -195,7 +217,7 @@ class Game(object):
             self.user_turn()
             self.output()
             
-            winner, combo = self.board.winner()
+            winner, combo = self.board.winner(self.assignment)
             if winner is not None:
                 return (winner, combo)
             
@@ -212,9 +234,223 @@ class Game(object):
         self.display_result(winner, combo)
         
 
-game = Game()
+class EngineGame(Game):
+    """
+    Base class for one command-line game on a board too big for the database.
+    
+    The computer plays the moves of a search engine, within a time budget per move.
+    Subclasses provide the board and the engine.
+    """
+    __slots__ = "engine",
+    
+    def __new__(cls, board, engine, level: Level = Level.Impossible):
+        self = object.__new__(cls)
+        self.board = board
+        self.database = None
+        self.assignment = None
+        self.engine = engine
+        self.level = level
+        return self
+    
+    def __init__(self, board, engine, level: Level = Level.Impossible):
+        pass
+    
+    def prepare(self, user_symbol: Symbol):
+        """
+        Assign the provided symbol to the user, the other to the computer.
+        """
+        self.assignment = Assignment(user_symbol)
+        
+    def output_slots(self) -> None:
+        """
+        Output the slot numbers to the user.
+        """
+        print(self.board.layout())
+        
+    def engine_slot(self) -> int:
+        """
+        Return the best slot the computer knows of: the engine's choice.
+        """
+        return self.engine.choose_move(self.board)
+        
+    def computer_turn(self):
+        """
+        Define one computer turn.
+        
+        At Level.Impossible, always play the best move known (see engine_slot()).
+        At lower levels, like the visual game, sometimes play a random move instead.
+        
+        Write the computer's symbol to its chosen index.
+        """
+        if random.randrange(3) + 1 > self.level.value:
+            slot = random.choice(self.board.available_slots())
+        else:
+            slot = self.engine_slot()
+        
+        # Write to the slot
+        self.board.push(slot)
+        
+    def run(self):
+        """
+        Run the game comprehensively, then release the engine's worker processes, if any.
+        """
+        try:
+            super().run()
+        finally:
+            if isinstance(self.engine, MCTSEngine):
+                self.engine.close()
+
+
+class MNKGame(EngineGame):
+    """
+    Class for one command-line game on a bigger board, won with k in a row.
+    
+    The computer looks its moves up in the board's tablebase, if one has been built, 
+    or else searches for them with the alpha-beta engine or Monte Carlo tree search.
+    """
+    __slots__ = "tablebase",
+    
+    def __new__(cls, rows: int, columns: int, k: int, budget: float = 1.0, 
+                level: Level = Level.Impossible, engine: str = "alphabeta", jobs: int = 1):
+        search = MCTSEngine(budget, jobs=jobs) if engine == "mcts" else AlphaBetaEngine(budget)
+        self = super().__new__(cls, MNKBoard(rows, columns, k), search, level)
+        self.tablebase: Optional[Tablebase] = None
+        return self
+    
+    def __init__(self, rows: int, columns: int, k: int, budget: float = 1.0, 
+                 level: Level = Level.Impossible, engine: str = "alphabeta", jobs: int = 1):
+        pass
+    
+    def prepare(self, user_symbol: Symbol):
+        """
+        Assign the provided symbol to the user, the other to the computer.
+        Get the board's tablebase, if built, for the computer's use.
+        """
+        super().prepare(user_symbol)
+        shape = self.board.geometry
+        self.tablebase = get_tablebase(shape.rows, shape.columns, shape.k)
+        
+    def engine_slot(self) -> int:
+        """
+        Return the best slot the computer knows of: perfectly with a tablebase,
+        else the best found by searching.
+        """
+        if self.tablebase is not None:
+            return random.choice(self.tablebase.best_slots(self.board))
+        return super().engine_slot()
+
+
+class GomokuGame(MNKGame):
+    """
+    Class for one command-line game of Gomoku: five in a row on a 15x15 board.
+    
+    The computer searches for its moves with the Gomoku engine, 
+    within a time budget per move.
+    """
+    __slots__ = ()
+    
+    def __new__(cls, budget: float = 1.0, level: Level = Level.Impossible):
+        self = EngineGame.__new__(cls, GomokuBoard(), GomokuEngine(budget), level)
+        self.tablebase = None
+        return self
+    
+    def __init__(self, budget: float = 1.0, level: Level = Level.Impossible):
+        pass
+        
+        
+class UltimateGame(EngineGame):
+    """
+    Class for one command-line game of Ultimate tic-tac-toe.
+    
+    The computer searches for its moves with Monte Carlo tree search,
+    within a time budget per move.
+    """
+    __slots__ = ()
+    
+    def __new__(cls, budget: float = 1.0, level: Level = Level.Impossible, jobs: int = 1):
+        return super().__new__(cls, UltimateBoard(), MCTSEngine(budget, jobs=jobs), level)
+    
+    def __init__(self, budget: float = 1.0, level: Level = Level.Impossible, jobs: int = 1):
+        pass
+        
+    def output(self) -> None:
+        """
+        Output the board to the user, and where the next move may be played.
+        """
+        print(self.board)
+        if self.board.forced is not None and not self.board.is_won():
+            print(f"The next move is in sub-board {self.board.forced}.")
+        
+    def write_user_input(self, index: int) -> bool:
+        """Write the user's symbol to the provided index on the game's
+        board, if the rules allow a move there.
+        
+        This function will return True if the write was sucessful,
+        False otherwise.
+        """
+        if index in self.board.available_slots():
+            self.board.push(index)
+            return True
+        return False
+
+            
+class QubicGame(EngineGame):
+    """
+    Class for one command-line game of Qubic, tic-tac-toe on a 4x4x4 cube.
+    
+    The computer plays by its threat search, within a time budget per move.
+    The slot numbers are output layer by layer.
+    """
+    __slots__ = ()
+    
+    def __new__(cls, budget: float = 1.0, level: Level = Level.Impossible):
+        return super().__new__(cls, QubicBoard(), QubicEngine(budget), level)
+    
+    def __init__(self, budget: float = 1.0, level: Level = Level.Impossible):
+        pass
+
+def main(argv: Optional[list[str]] = None) -> None:
+    "Run a game from the command line."
+    parser = ArgumentParser(description="Play tic-tac-toe against the computer.")
+    parser.add_argument("--board", choices=[*VARIANTS, "gomoku", "ultimate", "qubic"], default="3x3",
+                        help="the board to play on (default: 3x3)")
+    parser.add_argument("--budget", type=float, default=1.0,
+                        help="seconds the computer may think per move on boards bigger than 3x3")
+    parser.add_argument("--level", choices=[level.name for level in Level], default=Level.Impossible.name,
+                        help="the difficulty")
+    parser.add_argument("--engine", choices=("alphabeta", "mcts"), default="alphabeta",
+                        help="the search used on m,n,k boards bigger than 3x3 with no tablebase")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="processes, this one included, searching in parallel with Monte Carlo "
+                             "tree search, or analyzing positions with --analyze")
+    parser.add_argument("--analyze", metavar="FILE",
+                        help="instead of playing, analyze the 3x3 positions of the file (- for stdin), "
+                             "one per line like 'XO-------', and write their outcomes and best moves")
+    parser.add_argument("--format", choices=sorted(analysis.writers), default="csv",
+                        help="the output format of --analyze: CSV or JSON lines (default: csv)")
+    parser.add_argument("--protocol", action="store_true",
+                        help="instead of playing, answer engine commands on stdin, like UCI (see protocol.py)")
+    args = parser.parse_args(argv)
+    if args.protocol:
+        protocol.EngineProtocol().run()
+    elif args.analyze is not None:
+        if args.analyze == "-":
+            analysis.run(sys.stdin, sys.stdout, args.format, args.jobs)
+        else:
+            with open(args.analyze) as file:
+                analysis.run(file, sys.stdout, args.format, args.jobs)
+    elif args.board == "3x3":
+        Game(Level[args.level]).run()
+    elif args.board == "gomoku":
+        GomokuGame(args.budget, Level[args.level]).run()
+    elif args.board == "ultimate":
+        UltimateGame(args.budget, Level[args.level], args.jobs).run()
+    elif args.board == "qubic":
+        QubicGame(args.budget, Level[args.level]).run()
+    else:
+        MNKGame(*VARIANTS[args.board], args.budget, Level[args.level], args.engine, args.jobs).run()
 
 if __name__ == "__main__":
-    game.run()
+    main()
         
         
\ No newline at end of file
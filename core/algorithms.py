@@ -0,0 +1,54 @@
+"The computer's move choices: the inferior (tactical) algorithm, the superior (database) one, and their mix by Level."
+# File: tictactoe\core\algorithms.py
+
+from random import Random
+from typing import Optional
+
+import random
+
+from tictactoe.core.bitboard import BitBoard, completions, full_mask, mask_slots
+from tictactoe.core.database import Database
+from tictactoe.core.enums import *
+
+def tactical_masks(board: BitBoard, symbol: Symbol) -> tuple[int, int]:
+    """
+    Return the 9-bit masks of the slots where the side with the symbol wins at once,
+    and of those where it must block the opponent from winning next turn.
+    """
+    empty = full_mask & ~(board.x | board.o)
+    mine, theirs = (board.x, board.o) if symbol is Symbol.X else (board.o, board.x)
+    return completions[mine] & empty, completions[theirs] & empty
+
+def inferior_slots(board: BitBoard, symbol: Symbol) -> list[int]:
+    """
+    The Inferior Algorithm.
+    Return the slots for the side with the symbol to randomly choose from.
+
+    In general, this algorithm gathers a list of slots to randomly choose from
+    If the side can win, only winning slots are available
+    If the opponent can win next turn, only slots preventing the opponent's win are available
+    Otherwise, all empty slots are available
+    """
+    win, block = tactical_masks(board, symbol)
+    return list(mask_slots[win or block or full_mask & ~(board.x | board.o)])
+
+def superior_slots(board: BitBoard, database: Database) -> list[int]:
+    """
+    The Superior Algorithm.
+    Check the database and only slots allowing the best possible outcome
+    (winning the fastest or losing the slowest) are available for choosing
+    """
+    return database.best_slots(board)
+
+def level_slots(board: BitBoard, symbol: Symbol, level: Level, database: Database,
+                rng: Optional[Random] = None) -> list[int]:
+    """
+    Return the slots for the side with the symbol to randomly choose from, at the level.
+    At Level.Impossible, the superior algorithm always chooses; at lower levels,
+    the inferior algorithm sometimes chooses instead: with probability 1/3 at Level.Hard,
+    2/3 at Level.Medium and always at Level.Easy.
+    """
+    rng = random if rng is None else rng
+    if rng.randrange(3) + 1 > level.value:
+        return inferior_slots(board, symbol)
+    return superior_slots(board, database)
@@ -0,0 +1,130 @@
+"""
+Analyze streams of 3x3 positions with the CPU database, without loading them all into memory.
+
+Positions are read one per line, as 9 characters of 'XO-' like repr(Board)
+(the form BitBoard.from_string() parses), and each gives one record: the side to move, its outcome with
+best play, its best moves and the number of plies to the outcome. Invalid or
+unreachable positions give a record with an error instead.
+Every stage is a generator, so memory stays bounded whatever the input size.
+"""
+# File: tictactoe\core\analysis.py
+
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Optional, TextIO
+
+import csv
+import json
+
+from tictactoe.core.bitboard import mask_slots
+from tictactoe.core.database import Database, attach_database, get_database, share_database
+
+# The fields of each record, in CSV column order
+FIELDS = ("position", "to_move", "outcome", "best_moves", "depth", "error")
+# The positions sent to a worker process at once
+CHUNK_SIZE = 1024
+# The base-3 digit of each character of a position
+_digits = str.maketrans("-XO", "012")
+
+def read_positions(file: TextIO) -> Iterator[str]:
+    "Yield the positions of the file, one per non-blank line."
+    for line in file:
+        line = line.strip()
+        if line:
+            yield line
+
+def analyze(position: str, database: Database) -> dict:
+    "Return the record of the position."
+    record = dict.fromkeys(FIELDS)
+    record["position"] = position
+    if len(position) != 9 or position.strip("XO-"):
+        record["error"] = "Position must be 9 characters of 'XO-'"
+        return record
+    # X moves when there are as many Xs as Os, like BitBoard.to_move()
+    x, o = position.count("X"), position.count("O")
+    if x == o:
+        record["to_move"] = "X"
+    elif x - 1 == o:
+        record["to_move"] = "O"
+    else:
+        record["error"] = "Invalid board!"
+        return record
+    # The base-3 code, like BitBoard.code: slot i is the i-th digit from the right
+    code = int(position.translate(_digits)[::-1], 3)
+    try:
+        outcome, moves = database[code]
+    except KeyError:
+        record["error"] = "Position is unreachable"
+        return record
+    record["outcome"] = outcome.name
+    record["best_moves"] = list(mask_slots[moves])
+    record["depth"] = database.depth(code)
+    return record
+
+def analyze_positions(positions: Iterable[str], database: Optional[Database] = None) -> Iterator[dict]:
+    "Yield the record of each position, using the database (by default, get_database())."
+    database = get_database() if database is None else database
+    for position in positions:
+        yield analyze(position, database)
+
+def _analyze_chunk(chunk: list[str]) -> list[dict]:
+    # Analyze a chunk of positions in a worker process
+    return list(analyze_positions(chunk))
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    # Yield lists of up to size items of the iterable
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def analyze_parallel(positions: Iterable[str], jobs: int, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """
+    Yield the record of each position, in order, analyzing chunks of them in jobs
+    processes: jobs - 1 worker processes and this one, which takes every jobs-th chunk.
+    At most two chunks per job are read ahead, and the workers share one copy
+    of the database in shared memory.
+    """
+    if jobs <= 1:
+        yield from analyze_positions(positions)
+        return
+    with share_database() as shared, ProcessPoolExecutor(
+            jobs - 1, initializer=attach_database, initargs=(shared.name,)) as executor:
+        # The futures of the workers' chunks, and this process's chunks, still to analyze
+        pending = deque()
+        for index, chunk in enumerate(_chunks(positions, chunk_size)):
+            pending.append(chunk if index % jobs == 0 else executor.submit(_analyze_chunk, chunk))
+            if len(pending) >= 2 * jobs:
+                yield from _records(pending.popleft())
+        while pending:
+            yield from _records(pending.popleft())
+
+def _records(pending) -> list[dict]:
+    # The records of a pending chunk: analyze it here, or wait for its worker
+    if isinstance(pending, list):
+        return _analyze_chunk(pending)
+    return pending.result()
+
+def write_csv(records: Iterable[dict], file: TextIO) -> None:
+    "Write the records to the file as CSV, with a header row; best moves are separated by spaces."
+    writer = csv.writer(file, lineterminator="\n")
+    writer.writerow(FIELDS)
+    for record in records:
+        moves = record["best_moves"]
+        if moves is not None:
+            record["best_moves"] = " ".join(map(str, moves))
+        writer.writerow(["" if record[field] is None else record[field] for field in FIELDS])
+
+def write_json(records: Iterable[dict], file: TextIO) -> None:
+    "Write the records to the file as JSON lines, one object per record."
+    for record in records:
+        file.write(json.dumps(record, separators=(",", ":")))
+        file.write("\n")
+
+# The writers by format name
+writers = {"csv": write_csv, "json": write_json}
+
+def run(source: TextIO, output: TextIO, format: str = "csv", jobs: int = 1) -> None:
+    "Analyze the positions of the source, writing their records to the output in the format."
+    writers[format](analyze_parallel(read_positions(source), jobs), output)
@@ -0,0 +1,121 @@
+"""
+Vectorized codec and evaluator for many tic-tac-toe positions at once.
+
+Positions are held as (N, 9) int8 arrays, one row per board and one column per
+slot: EMPTY (0), X (1) or O (2), the digits of the board's base-3 code.
+This module needs NumPy, which the rest of the package does not.
+"""
+# File: tictactoe\core\batch.py
+
+from collections.abc import Iterable, Sequence
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError as exc:
+    raise ImportError("tictactoe.core.batch needs NumPy (pip install numpy)") from exc
+
+from tictactoe.core.board import wins
+from tictactoe.core.enums import *
+
+# The value of each slot
+EMPTY, X, O = 0, 1, 2
+
+# The win combinations as an (8, 3) index array, in the same order as board.wins
+win_index = np.array(wins, dtype=np.intp)
+
+# The weight of each slot in the base-3 code of a board, like BitBoard.code
+_weights = 3 ** np.arange(9, dtype=np.int32)
+# The bit of each slot in a 9-bit mask
+_bits = (1 << np.arange(9)).astype(np.uint16)
+# The value of each character of a position string, -1 if invalid
+_values = np.full(256, -1, dtype=np.int8)
+_values[ord("-")], _values[ord("X")], _values[ord("O")] = EMPTY, X, O
+# The character of each value
+_chars = np.frombuffer(b"-XO", dtype=np.uint8)
+
+def _value(symbol: Optional[Symbol]) -> int:
+    # Return the slot value of a symbol
+    if symbol is Symbol.X:
+        return X
+    if symbol is Symbol.O:
+        return O
+    return EMPTY
+
+## Conversions
+def from_strings(strings: Sequence[str]) -> np.ndarray:
+    """
+    Return the (N, 9) array of the position strings provided,
+    each being 9 characters of 'XO-', like repr(Board).
+    """
+    if any(len(string) != 9 for string in strings):
+        raise ValueError("Each string must be 9 characters long")
+    try:
+        data = np.frombuffer("".join(strings).encode("ascii"), dtype=np.uint8)
+    except UnicodeEncodeError:
+        raise ValueError("Character must be in 'XO-'") from None
+    arrays = _values[data].reshape(-1, 9)
+    if (arrays < 0).any():
+        raise ValueError("Character must be in 'XO-'")
+    return arrays
+
+def to_strings(arrays: np.ndarray) -> list[str]:
+    "Return the position string of each board, like repr(Board)."
+    data = _chars[arrays].tobytes().decode("ascii")
+    return [data[i:i + 9] for i in range(0, len(data), 9)]
+
+def to_codes(arrays: np.ndarray) -> np.ndarray:
+    "Return the base-3 code of each board, like BitBoard.code."
+    return arrays.astype(np.int32) @ _weights
+
+def from_codes(codes: Iterable[int]) -> np.ndarray:
+    "Return the (N, 9) array of the base-3 codes provided."
+    codes = np.asarray(codes, dtype=np.int32)
+    if ((codes < 0) | (codes >= 3 ** 9)).any():
+        raise ValueError("Code must be between 0 and 3 ** 9 - 1")
+    return (codes[:, None] // _weights % 3).astype(np.int8)
+
+## Evaluation
+def winners(arrays: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Return the symbol value of the winner of each board (EMPTY for none)
+    and the index into board.wins of its win combination (-1 for none).
+    Like Board.win(), the first complete combination in wins order counts.
+    """
+    lines = arrays[:, win_index] # (N, 8, 3)
+    first = lines[:, :, 0]
+    complete = (first != EMPTY) & (lines[:, :, 1] == first) & (lines[:, :, 2] == first)
+    won = complete.any(axis=1)
+    index = complete.argmax(axis=1)
+    symbols = np.where(won, first[np.arange(len(arrays)), index], EMPTY).astype(np.int8)
+    combos = np.where(won, index, -1).astype(np.int8)
+    return symbols, combos
+
+def ranks(arrays: np.ndarray, assignment: Assignment) -> np.ndarray:
+    """
+    Return the Outcome value of each board from the perspective of the computer,
+    by the provided assignment, like Board.rank().
+    """
+    computer = _value(assignment.computer)
+    symbols, _ = winners(arrays)
+    outcomes = np.full(len(arrays), Outcome.Undetermined.value, dtype=np.int8)
+    outcomes[(arrays != EMPTY).all(axis=1)] = Outcome.Draw.value
+    outcomes[symbols == computer] = Outcome.Win.value
+    outcomes[(symbols != EMPTY) & (symbols != computer)] = Outcome.Loss.value
+    return outcomes
+
+def turns(arrays: np.ndarray) -> np.ndarray:
+    """
+    Return the symbol value of the side to move on each board,
+    or EMPTY if the board is invalid (where Board.to_move() raises ValueError).
+    """
+    x = (arrays == X).sum(axis=1)
+    o = (arrays == O).sum(axis=1)
+    return np.select([x == o, x - 1 == o], [X, O], EMPTY).astype(np.int8)
+
+def legal_masks(arrays: np.ndarray) -> np.ndarray:
+    """
+    Return the 9-bit mask of the empty slots of each board,
+    the slots of Board.available_slots() (see bitboard.mask_slots).
+    """
+    return (arrays == EMPTY).astype(np.uint16) @ _bits
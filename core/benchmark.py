@@ -0,0 +1,167 @@
+"Microbenchmarks for the core tic-tac-toe types."
+# File: tictactoe\core\benchmark.py
+
+from argparse import ArgumentParser
+from random import Random
+from time import perf_counter
+from timeit import repeat
+from typing import Optional
+
+from tictactoe.core.bitboard import BitBoard
+from tictactoe.core.board import Board
+from tictactoe.core.engine import AlphaBetaEngine
+from tictactoe.core.enums import *
+from tictactoe.core.gomoku import GomokuBoard, GomokuEngine
+from tictactoe.core.mcts import MCTSEngine
+from tictactoe.core.mnk import VARIANTS, MNKBoard
+
+# The Board methods being compared
+methods = "winner", "rank", "is_draw", "available_slots", "turn"
+# The methods answering in terms of players, taking the assignment of symbols
+_assigned = "winner", "rank", "turn"
+
+def reachable_positions() -> list[str]:
+    """
+    Return the string form of every position reachable in a legal game,
+    including the empty board.
+    """
+    seen = set()
+    stack = [Board()]
+    while stack:
+        board = stack.pop()
+        key = repr(board)
+        if key in seen:
+            continue
+        seen.add(key)
+        winner, _ = board.win()
+        if winner is not None:
+            continue
+        symbol = Symbol.X if board.count(Symbol.X) == board.count(Symbol.O) else Symbol.O
+        for slot in board.available_slots():
+            child = Board(board)
+            child[slot] = symbol
+            stack.append(child)
+    return sorted(seen)
+
+def time_method(boards: list, method: str, args: tuple = (), number: int = 20) -> float:
+    "Return the best time, in nanoseconds, for one call of the method with the args on one board."
+    calls = [getattr(board, method) for board in boards]
+    def run():
+        for call in calls:
+            call(*args)
+    best = min(repeat(run, number=number, repeat=5))
+    return best / (number * len(boards)) * 1e9
+
+def compare_boards() -> None:
+    "Print the per-call timings of Board and BitBoard over all reachable positions."
+    # winner(), rank() and turn() need the players' symbols: the computer plays X
+    assignment = Assignment(Symbol.O)
+    arguments = {method: (assignment,) if method in _assigned else () for method in methods}
+    positions = reachable_positions()
+    boards = [Board.from_string(position) for position in positions]
+    bitboards = [BitBoard.from_string(position) for position in positions]
+    # Both representations must agree before their timings mean anything
+    for board, bitboard in zip(boards, bitboards):
+        for method in methods:
+            args = arguments[method]
+            assert getattr(board, method)(*args) == getattr(bitboard, method)(*args), (repr(board), method)
+    print(f"{len(positions)} positions")
+    print(f"{'method':<16}{'Board (ns)':>12}{'BitBoard (ns)':>15}{'speedup':>9}")
+    for method in methods:
+        list_time = time_method(boards, method, arguments[method])
+        bit_time = time_method(bitboards, method, arguments[method])
+        print(f"{method:<16}{list_time:>12.0f}{bit_time:>15.0f}{list_time / bit_time:>8.1f}x")
+
+def mcts_throughput(variant: str = "7x7", budget: float = 5.0, jobs: int = 1) -> None:
+    "Print the playouts per second of Monte Carlo tree search from the empty board of the variant."
+    board = MNKBoard(*VARIANTS[variant])
+    with MCTSEngine(budget, jobs=jobs, seed=0) as engine:
+        result = engine.search(board)
+    print(f"{variant}, {jobs} process(es): {result.playouts} playouts in {result.elapsed:.2f} s, "
+          f"{result.playouts_per_second:.0f} playouts/s")
+
+def gomoku_position(stones: int = 8, seed: int = 0) -> GomokuBoard:
+    """
+    Return a Gomoku position of random stones near each other, with no three
+    in a window, so there's no forced win to cut the search short at once.
+    """
+    rng = Random(seed)
+    board = GomokuBoard()
+    while board.pieces < stones:
+        board.push(rng.choice(board.candidates()))
+        if any(side[3] or side[4] for side in board.patterns):
+            board.pop()
+    return board
+
+def gomoku_speed(budget: float = 5.0, positions: int = 10) -> None:
+    """
+    Print the search speed of the Gomoku engine over a few positions,
+    and what its incremental evaluation saves.
+    """
+    boards = [gomoku_position(seed=seed) for seed in range(positions)]
+    board = boards[0]
+    engine = GomokuEngine(budget / positions)
+    # The pattern counts against a rescan of every line, as AlphaBetaEngine does
+    incremental = min(repeat(lambda: engine.evaluate(board), number=1000, repeat=5)) / 1000 * 1e9
+    rescan = min(repeat(lambda: AlphaBetaEngine.evaluate(engine, board), number=100, repeat=5)) / 100 * 1e9
+    slot = board.candidates()[0]
+    def move():
+        board.push(slot)
+        board.pop()
+    make = min(repeat(move, number=1000, repeat=5)) / 1000 * 1e9
+    print(f"evaluate: {incremental:.0f} ns from pattern counts, {rescan:.0f} ns rescanning")
+    print(f"push + pop: {make:.0f} ns")
+    nodes, elapsed = 0, 0.0
+    for board in boards:
+        engine.table.clear()
+        result = engine.search(board)
+        nodes += result.nodes
+        elapsed += result.elapsed
+    print(f"search: {nodes} nodes over {positions} positions in {elapsed:.2f} s, "
+          f"{nodes / elapsed:.0f} nodes/s")
+
+def batch_throughput(count: int = 1_000_000) -> None:
+    "Print the boards per second of the vectorized batch functions (needs NumPy)."
+    from tictactoe.core import batch
+    codes = [index * 7919 % 3 ** 9 for index in range(count)]
+    arrays = batch.from_codes(codes)
+    strings = batch.to_strings(arrays)
+    functions = {
+        "from_strings": lambda: batch.from_strings(strings),
+        "to_strings": lambda: batch.to_strings(arrays),
+        "from_codes": lambda: batch.from_codes(codes),
+        "to_codes": lambda: batch.to_codes(arrays),
+        "winners": lambda: batch.winners(arrays),
+        "ranks": lambda: batch.ranks(arrays, Assignment(Symbol.O)),
+        "turns": lambda: batch.turns(arrays),
+        "legal_masks": lambda: batch.legal_masks(arrays),
+    }
+    print(f"{count} boards")
+    for name, function in functions.items():
+        start = perf_counter()
+        function()
+        print(f"{name:<16}{count / (perf_counter() - start) / 1e6:>8.1f} M boards/s")
+
+def main(argv: Optional[list[str]] = None) -> None:
+    "Run the benchmarks from the command line."
+    parser = ArgumentParser(description="Microbenchmarks for the core tic-tac-toe types.")
+    parser.add_argument("--mcts", choices=VARIANTS, metavar="VARIANT",
+                        help="measure Monte Carlo tree search playouts on the variant instead")
+    parser.add_argument("--gomoku", action="store_true",
+                        help="measure the Gomoku engine's nodes per second instead")
+    parser.add_argument("--batch", action="store_true",
+                        help="measure the vectorized batch functions instead (needs NumPy)")
+    parser.add_argument("--budget", type=float, default=5.0, help="seconds of search with --mcts or --gomoku")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="processes searching with --mcts")
+    args = parser.parse_args(argv)
+    if args.mcts:
+        mcts_throughput(args.mcts, args.budget, args.jobs)
+    elif args.gomoku:
+        gomoku_speed(args.budget)
+    elif args.batch:
+        batch_throughput()
+    else:
+        compare_boards()
+
+if __name__ == "__main__":
+    main()
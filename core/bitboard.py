@@ -0,0 +1,318 @@
+"Define the BitBoard class, a bitwise alternative to the list-based Board."
+# File: tictactoe\core\bitboard.py
+
+from collections.abc import Iterable
+from functools import reduce
+from operator import or_
+from typing import Optional
+
+from tictactoe.core.board import Combination, wins, _board_symbol, _elem_str
+from tictactoe.core.enums import *
+
+# Helpers
+
+# Mask with every slot set
+full_mask = 0b111111111
+
+# The win combinations as 9-bit masks, in the same order as board.wins
+win_masks = tuple(sum(1 << index for index in combo) for combo in wins)
+
+## Lookup tables, indexed by a 9-bit mask
+# Number of slots set in the mask
+popcount = tuple(bin(mask).count("1") for mask in range(512))
+# The slots set in the mask, in ascending order
+mask_slots = tuple(tuple(index for index in range(9) if mask >> index & 1) for mask in range(512))
+# The weight of each slot in the base-3 code of a board
+_weights = tuple(3 ** index for index in range(9))
+# Index (into wins) of the first win combination contained in the mask,
+# or len(wins) if the mask contains no win combination
+first_win = tuple(
+    next((i for i, win in enumerate(win_masks) if mask & win == win), len(wins))
+    for mask in range(512)
+)
+# The slots completing a win combination with two slots of the mask,
+# whether or not they are empty: a side can win on those of its mask which are
+# empty, and must block those of its opponent's mask
+completions = tuple(
+    reduce(or_, (win & ~mask for win in win_masks if popcount[mask & win] == 2), 0)
+    for mask in range(512)
+)
+
+class MoveStack(object):
+    """
+    The moves of a board played with push() and unmade with pop(), and the parts
+    of the board interface built on its other methods, shared by every board class
+    which keeps its moves in a _moves list. The board must also be a sequence of
+    its slots (__len__() and __getitem__()), and provide push(), pop(), to_move(),
+    win() and is_full().
+    """
+
+    __slots__ = ()
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return "".join([_elem_str(obj) for obj in self])
+
+    @property
+    def moves(self) -> tuple[int, ...]:
+        "The slots played with push() and not popped yet, oldest first."
+        return tuple(self._moves)
+
+    def take_back(self, symbol: Symbol) -> list[int]:
+        """
+        Pop moves until the last move of the side with the provided symbol is unmade,
+        so it is that side's turn again. Return the slots popped, latest first;
+        nothing is popped if the side has no move to take back.
+        """
+        moves = self._moves
+        # The last move was made by the side not on turn, and moves alternate
+        last_symbol = self.to_move().opposite()
+        if not moves or (len(moves) == 1 and last_symbol is not symbol):
+            return []
+        slots = [self.pop()]
+        if last_symbol is not symbol:
+            slots.append(self.pop())
+        return slots
+
+    def winner(self, assignment: Assignment) -> tuple[Optional[Player], Optional[tuple[int, ...]]]:
+        """
+        Return the player who won, by the provided assignment, and the win combination,
+        if that information is available. Otherwise, return (None, None)
+        """
+        symbol, combo = self.win()
+        if symbol is None:
+            return (None, None)
+        return (assignment.player(symbol), combo)
+
+    def rank(self, assignment: Assignment) -> Outcome:
+        """
+        Return the outcome of the board,
+        from the prespective of the computer, by the provided assignment.
+        """
+        symbol, _ = self.win()
+        return assignment.outcome(symbol, self.is_full())
+
+    def turn(self, assignment: Assignment) -> Player:
+        "Return the player whose turn it is, by the provided assignment"
+        return assignment.player(self.to_move())
+
+class BitBoard(MoveStack):
+    """
+    The tic-tac-toe board, stored as two 9-bit integers (one per symbol).
+
+    Has the same public interface as Board, but answers winner(), rank(),
+    is_draw(), available_slots() and turn() with a few bitwise operations.
+    Moves can also be made and unmade in place with push() and pop().
+
+    The board's base-3 code (X = 1, O = 2, slot i being the i-th digit)
+    is kept up to date on every move, for use as a key.
+    """
+
+    __slots__ = "x", "o", "code", "_moves"
+
+    def __new__(cls, iterable: Iterable[Optional[Symbol]] = ()):
+        self = object.__new__(cls)
+        self.x = 0
+        self.o = 0
+        self.code = 0
+        self._moves = []
+        # Only the first 9 elements are considered, like Board
+        for index, symbol in zip(range(9), iterable):
+            self[index] = symbol
+        return self
+
+    def __init__(self, iterable: Iterable[Optional[Symbol]] = ()):
+        pass
+
+    def __reduce_ex__(self, protocol: int):
+        return (type(self), (tuple(self),))
+
+    def __copy__(self):
+        other = object.__new__(type(self))
+        other.x = self.x
+        other.o = self.o
+        other.code = self.code
+        other._moves = self._moves.copy()
+        return other
+
+    @classmethod
+    def from_string(cls, strobj: str):
+        self = cls()
+        index = 0
+        for char in strobj:
+            if char in "XO-":
+                if index >= 9:
+                    raise ValueError("String represents nonexistant board")
+                self[index] = _board_symbol(char)
+                index += 1
+        return self
+
+    ## Sequence protocol, so the BitBoard can be used wherever a Board is
+    def __len__(self) -> int:
+        return 9
+
+    def __getitem__(self, index):
+        # A slice gives a list of the slots, like Board
+        if isinstance(index, slice):
+            return [self[i] for i in range(9)[index]]
+        if not -9 <= index < 9:
+            raise IndexError("board index out of range")
+        bit = 1 << (index % 9)
+        if self.x & bit:
+            return Symbol.X
+        if self.o & bit:
+            return Symbol.O
+        return None
+
+    def __setitem__(self, index: int, symbol: Optional[Symbol]) -> None:
+        if not -9 <= index < 9:
+            raise IndexError("board index out of range")
+        if symbol is not None and not isinstance(symbol, Symbol):
+            raise TypeError("BitBoard elements must be Symbol or None")
+        index %= 9
+        bit = 1 << index
+        # Clear the slot, then set the bit of the new symbol (if any)
+        if self.x & bit:
+            self.x &= ~bit
+            self.code -= _weights[index]
+        elif self.o & bit:
+            self.o &= ~bit
+            self.code -= 2 * _weights[index]
+        if symbol is Symbol.X:
+            self.x |= bit
+            self.code += _weights[index]
+        elif symbol is Symbol.O:
+            self.o |= bit
+            self.code += 2 * _weights[index]
+
+    def __contains__(self, symbol: Optional[Symbol]) -> bool:
+        if symbol is None:
+            return (self.x | self.o) != full_mask
+        if symbol is Symbol.X:
+            return bool(self.x)
+        if symbol is Symbol.O:
+            return bool(self.o)
+        return False
+
+    def __eq__(self, other):
+        if isinstance(other, BitBoard):
+            return self.code == other.code
+        return NotImplemented
+
+    # The board changes in place, so it is not hashable: key on its code instead
+    __hash__ = None
+
+    def count(self, symbol: Optional[Symbol]) -> int:
+        "Return the number of slots holding the symbol (None for empty slots)."
+        if symbol is Symbol.X:
+            return popcount[self.x]
+        if symbol is Symbol.O:
+            return popcount[self.o]
+        if symbol is None:
+            return 9 - popcount[self.x | self.o]
+        return 0
+
+    ## Making and unmaking moves
+    def push(self, slot: int) -> None:
+        "Play the symbol of the side to move on the empty slot."
+        # The range first: a negative slot can't be shifted by
+        if not 0 <= slot < 9 or (self.x | self.o) >> slot & 1:
+            raise ValueError(f"slot {slot} is not available")
+        bit = 1 << slot
+        # X moves when there are as many Xs as Os
+        if popcount[self.x] == popcount[self.o]:
+            self.x |= bit
+            self.code += _weights[slot]
+        else:
+            self.o |= bit
+            self.code += 2 * _weights[slot]
+        self._moves.append(slot)
+
+    def pop(self) -> int:
+        "Unmake the last move played with push() and return its slot."
+        slot = self._moves.pop()
+        bit = 1 << slot
+        if self.x & bit:
+            self.x &= ~bit
+            self.code -= _weights[slot]
+        elif self.o & bit:
+            self.o &= ~bit
+            self.code -= 2 * _weights[slot]
+        return slot
+
+    ## Board interface
+    def win(self) -> tuple[Optional[Symbol], Optional[Combination]]:
+        """
+        Return the symbol which won and the win combination, if that information is available.
+        Otherwise, return (None, None)
+        """
+        # Like Board.win(), report the first win combination in wins order
+        x_index = first_win[self.x]
+        o_index = first_win[self.o]
+        if x_index < o_index:
+            return (Symbol.X, wins[x_index])
+        if o_index < len(wins):
+            return (Symbol.O, wins[o_index])
+        return (None, None)
+
+    def winner(self, assignment: Assignment) -> tuple[Optional[Player], Optional[Combination]]:
+        """
+        Return the player who won, by the provided assignment, and the win combination,
+        if that information is available. Otherwise, return (None, None)
+        """
+        x_index = first_win[self.x]
+        o_index = first_win[self.o]
+        if x_index < o_index:
+            return (assignment.player(Symbol.X), wins[x_index])
+        if o_index < len(wins):
+            return (assignment.player(Symbol.O), wins[o_index])
+        return (None, None)
+
+    def is_full(self) -> bool:
+        "Return if every slot is taken."
+        return (self.x | self.o) == full_mask
+
+    def is_draw(self) -> bool:
+        "Return if there is a draw."
+        return ((self.x | self.o) == full_mask
+                and first_win[self.x] == first_win[self.o] == len(wins))
+
+    def rank(self, assignment: Assignment) -> Outcome:
+        """
+        Return the outcome of the board,
+        from the prespective of the computer, by the provided assignment.
+        """
+        x_index = first_win[self.x]
+        o_index = first_win[self.o]
+        if x_index < o_index:
+            symbol = Symbol.X
+        elif o_index < len(wins):
+            symbol = Symbol.O
+        elif (self.x | self.o) != full_mask:
+            return Outcome.Undetermined
+        else:
+            return Outcome.Draw
+        return Outcome.Win if symbol is assignment.computer else Outcome.Loss
+
+    def __str__(self):
+        elems = [_elem_str(obj) for obj in self]
+        s = ""
+        for i in range(0, 9, 3):
+            s = s + " ".join(elems[i:i+3]) + "\n"
+        return s
+
+    def available_slots(self) -> list[int]:
+        "Return the slots available"
+        return list(mask_slots[full_mask & ~(self.x | self.o)])
+
+    def to_move(self) -> Symbol:
+        "Return the symbol whose turn it is"
+        x, o = popcount[self.x], popcount[self.o]
+        if x == o:
+            return Symbol.X
+        if (x - 1) == o:
+            return Symbol.O
+        raise ValueError("Invalid board!")
@@ -17,6 +17,9 @@ wins = (*horizontal_wins, *vertical_wins, *diagonal_wins)
 # Annotation for a combination
 Combination = tuple[int, int, int]
 
+# The indices (into wins) of the combinations through each slot
+combos_through = tuple(tuple(i for i, combo in enumerate(wins) if index in combo) for index in range(9))
+
 ## Helper functions
 def _elem_str(obj: Optional[Symbol]) -> str:
     # Return the string representation for a board element
@@ -37,18 +40,25 @@ def _board_symbol(char: str) -> Optional[Symbol]:
 class Board(list):
     """
     The tic-tac-toe board. 
+    
+    The board counts the symbols on each win combination, and which combinations
+    are complete, as its slots are assigned. Each assignment only updates the 
+    combinations through its slot, so winner(), is_draw() and rank() are answered
+    from those counts. The other list methods changing the board count it again.
     """
     
-    __slots__ = ()
+    __slots__ = "_x_counts", "_o_counts", "_complete", "_filled"
     
     def __new__(cls, iterable: Iterable[Symbol] = ()):
         # Get a new object from list.__new__(cls, ())
         self = list.__new__(cls, ())
         # Extends self with the iterable provided
-        self.extend(iterable[:9])
+        list.extend(self, iterable[:9])
         # Pad the unassigned slots with the None value
         if len(self) < 9:
-            self.extend([None] * (9 - len(self)))
+            list.extend(self, [None] * (9 - len(self)))
+        # Count the symbols
+        self._recount()
         # Return self. Whew!
         return self
     
@@ -58,6 +68,99 @@ class Board(list):
     def __reduce_ex__(self, protocol: int):
         return (__newobj__, (type(self), tuple(self)), None, None, None)
     
+    ## Counting the symbols
+    def _recount(self) -> None:
+        # Count the symbols on every combination from scratch
+        # The X and O symbols on each combination
+        self._x_counts = [0] * len(wins)
+        self._o_counts = [0] * len(wins)
+        # The mask of the complete combinations, bit i for wins[i]
+        self._complete = 0
+        # The number of slots holding something
+        self._filled = 0
+        # Only the 9 slots of a board, while a list method leaves more
+        for index, obj in zip(range(len(combos_through)), self):
+            self._count(index, obj, 1)
+            
+    def _count(self, index: int, obj, step: int) -> None:
+        # Add (step 1) or remove (step -1) the object in the slot from the counts
+        if obj is None:
+            return
+        self._filled += step
+        if obj is Symbol.X:
+            counts = self._x_counts
+        elif obj is Symbol.O:
+            counts = self._o_counts
+        else:
+            return
+        # Only the combinations through the slot change
+        for i in combos_through[index]:
+            counts[i] += step
+            if counts[i] == 3:
+                self._complete |= 1 << i
+            else:
+                self._complete &= ~(1 << i)
+    
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            list.__setitem__(self, index, value)
+            self._recount()
+            return
+        # Raise IndexError for a bad index, before changing anything
+        old = self[index]
+        list.__setitem__(self, index, value)
+        index %= len(self)
+        self._count(index, old, -1)
+        self._count(index, value, 1)
+    
+    # The other list methods changing the board, which count the symbols again
+    def __delitem__(self, index) -> None:
+        list.__delitem__(self, index)
+        self._recount()
+    
+    def __iadd__(self, iterable: Iterable[Symbol]):
+        list.extend(self, iterable)
+        self._recount()
+        return self
+    
+    def __imul__(self, times: int):
+        list.__imul__(self, times)
+        self._recount()
+        return self
+    
+    def append(self, obj: Optional[Symbol]) -> None:
+        list.append(self, obj)
+        self._recount()
+    
+    def extend(self, iterable: Iterable[Symbol]) -> None:
+        list.extend(self, iterable)
+        self._recount()
+    
+    def insert(self, index: int, obj: Optional[Symbol]) -> None:
+        list.insert(self, index, obj)
+        self._recount()
+    
+    def pop(self, index: int = -1) -> Optional[Symbol]:
+        obj = list.pop(self, index)
+        self._recount()
+        return obj
+    
+    def remove(self, obj: Optional[Symbol]) -> None:
+        list.remove(self, obj)
+        self._recount()
+    
+    def clear(self) -> None:
+        list.clear(self)
+        self._recount()
+    
+    def reverse(self) -> None:
+        list.reverse(self)
+        self._recount()
+    
+    def sort(self, *, key=None, reverse: bool = False) -> None:
+        list.sort(self, key=key, reverse=reverse)
+        self._recount()
+    
     @classmethod
     def from_string(cls, strobj: str):
         self = cls()
@@ -70,61 +173,50 @@ class Board(list):
                 index += 1
         return self
     
-    def winner(self) -> tuple[Optional[Player], Optional[Combination]]:
+    def win(self) -> tuple[Optional[Symbol], Optional[Combination]]:
         """
-        Return the player who won and the win combination, if that information is available.
+        Return the symbol which won and the win combination, if that information is available.
         Otherwise, return (None, None)
         """
-        # Iterate over all the win combinations
-        for combo in wins:
-            # The desired symbol
-            desired_symbol = None
-            # Iterate over every index in the combo
-            for index in combo:
-                # Find the symbol contained in the index
-                symbol = self[index]
-                # If the symbol is None, the slot is empty.
-                # Thus, there is no win from this combo.
-                if symbol is None:
-                    break
-                # The symbol is not the desired symbol.
-                # Thus, there is no win from this combo.
-                if desired_symbol is not None:
-                    if symbol is not desired_symbol:
-                        break
-                else:
-                    # Set our desired symbol to the symbol
-                    desired_symbol = symbol
-            else:
-                # We have found three identical symbols in a horizontal combo
-                # Return the symbol's player and the combo
-                return (symbol.player, tuple(combo))
-            
-        return (None, None)
+        # No combination is complete
+        if not self._complete:
+            return (None, None)
+        # Report the first complete combination, in wins order
+        index = (self._complete & -self._complete).bit_length() - 1
+        symbol = Symbol.X if self._x_counts[index] == 3 else Symbol.O
+        # Return the symbol and the combo
+        return (symbol, wins[index])
+    
+    def winner(self, assignment: Assignment) -> tuple[Optional[Player], Optional[Combination]]:
+        """
+        Return the player who won, by the provided assignment, and the win combination, 
+        if that information is available. Otherwise, return (None, None)
+        """
+        if not self._complete:
+            return (None, None)
+        index = (self._complete & -self._complete).bit_length() - 1
+        symbol = Symbol.X if self._x_counts[index] == 3 else Symbol.O
+        return (assignment.player(symbol), wins[index])
     
     def is_draw(self) -> bool:
         "Return if there is a draw."
         # If there is an empty slot, return False. 
         # There is no draw.
-        if None in self:
+        if self._filled < len(self):
             return False
-        # Return if self.winner() doesn't determine a winner
-        winner, _ = self.winner()
-        return not winner
+        # Return if no combination is complete
+        return not self._complete
     
-    def rank(self) -> Outcome:
+    def rank(self, assignment: Assignment) -> Outcome:
         """
         Return the outcome of the board, 
-        from the computer's prespective.
+        from the prespective of the computer, by the provided assignment.
         """
-        winner, _ = self.winner()
-        if winner is Player.Computer:
-            return Outcome.Win
-        elif winner is Player.User:
-            return Outcome.Loss
-        elif None in self:
-            return Outcome.Undetermined
-        return Outcome.Draw
+        if not self._complete:
+            return Outcome.Draw if self._filled == len(self) else Outcome.Undetermined
+        index = (self._complete & -self._complete).bit_length() - 1
+        symbol = Symbol.X if self._x_counts[index] == 3 else Symbol.O
+        return Outcome.Win if symbol is assignment.computer else Outcome.Loss
     
     def __repr__(self):
         return "".join([_elem_str(obj) for obj in self])
@@ -144,14 +236,18 @@ class Board(list):
                 listobj.append(index)
         return listobj
     
-    def turn(self) -> Player:
-        "Return the player whose turn it is"
+    def to_move(self) -> Symbol:
+        "Return the symbol whose turn it is"
         x, o = self.count(Symbol.X), self.count(Symbol.O)
         if x == o:
-            return Symbol.X.player
+            return Symbol.X
         if (x - 1) == o:
-            return Symbol.O.player
-        raise ValueError("Invalid board!")    
+            return Symbol.O
+        raise ValueError("Invalid board!")
+    
+    def turn(self, assignment: Assignment) -> Player:
+        "Return the player whose turn it is, by the provided assignment"
+        return assignment.player(self.to_move())    
         
         
                     
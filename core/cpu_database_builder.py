@@ -1,97 +1,201 @@
 "Generate the CPU database for the more sophisticated algorithm."
 # File: tictactoe\core\cpu_database_builder.py
 
-from tictactoe.core.board import Board
+from tictactoe.core.bitboard import full_mask, mask_slots, popcount, win_masks
+from tictactoe.core.database import DATA_DIR, FILE, dump
 from tictactoe.core.enums import *
+from tictactoe.core.symmetry import canonical_masks, decode, images
 
-from copy import copy
-from pickle import dump
-
-registry = {}
-
-def _register(board: Board, outcome: Outcome) -> None:
-    # Set repr(board) to outcome in registry
-    registry[repr(board)] = outcome
-
-
-def recursive_rank(board: Board) -> Outcome:
-    # Get the "obvious" rank
-    rank = board.rank()
-    # If this board has been rated previously, don't do it again.
-    # Rather use the registry.
-    if repr(board) in registry:
-        return registry[repr(board)]
-    # If the obvious rank is determined, return it.
-    # This is the base case.
-    if rank is not Outcome.Undetermined:
-        _register(board, rank)
-        return rank
-    # Get the player whose turn it is
-    player = board.turn()
-    # Get the avaliable slots
-    slots = board.available_slots()
-    # List of outcomes
-    outcomes = []
-    # Iterate over the avaliable slots
-    for slot in slots:
-        # Copy the board
-        board_copy = copy(board)
-        # Add the symbol of the player to the current slot
-        board_copy[slot] = player.symbol
-        # Determine its outcome by recursively calling this function 
-        #assert board_copy.count(None) < board.count(None)
-        outcomes.append(recursive_rank(board_copy))
-    # Assume both players play perfectly
-    # Therefore, they will choose the best option for themselves
-    # Reminder: the outcomes are from the computer's prespective
-    if player == Player.Computer:
-        if Outcome.Win in outcomes:
-            outcome = Outcome.Win
-        elif Outcome.Draw in outcomes:
-            outcome = Outcome.Draw
-        else:
-            outcome = Outcome.Loss
-        return outcome
-    else:
-        # Only boards which the computer can act upon are registered
-        # After the player's move it is the computer turn
-        if Outcome.Loss in outcomes:
-            outcome = Outcome.Loss
-        elif Outcome.Draw in outcomes:
-            outcome = Outcome.Draw
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Optional
+
+import os
+import sys
+
+# A solved position: its outcome, best moves and depth
+Entry = tuple[Outcome, int, int]
+
+# The outcome of the side to move, by the outcome of the side which moved
+_reversed = {Outcome.Win: Outcome.Loss, Outcome.Draw: Outcome.Draw, Outcome.Loss: Outcome.Win}
+
+def _has_won(mask: int) -> bool:
+    # Return if the symbol with the mask has a win combination
+    for win in win_masks:
+        if mask & win == win:
+            return True
+    return False
+
+def _preference(outcome: Outcome, depth: int) -> tuple[int, int]:
+    # The order in which the side to move prefers its outcomes, lowest first:
+    # the fastest win, then a draw, then the slowest loss
+    if outcome is Outcome.Win:
+        return (outcome.value, depth)
+    if outcome is Outcome.Loss:
+        return (outcome.value, -depth)
+    return (outcome.value, 0)
+
+def enumerate_positions(x: int = 0, o: int = 0) -> list[dict[int, tuple[int, int]]]:
+    """
+    Return every legal position reachable from the provided one (by default, the empty board),
+    grouped by the number of pieces on the board.
+    Each group maps canonical codes to the position's X and O masks.
+    """
+    levels = [{} for _ in range(10)]
+    code, x, o, _ = canonical_masks(x, o)
+    start = popcount[x | o]
+    levels[start][code] = (x, o)
+    for pieces in range(start, 9):
+        level = levels[pieces + 1]
+        # X moves when the piece count is even
+        x_moves = pieces % 2 == 0
+        for x, o in levels[pieces].values():
+            # Finished games have no successors
+            if _has_won(x) or _has_won(o):
+                continue
+            for slot in mask_slots[full_mask & ~(x | o)]:
+                bit = 1 << slot
+                if x_moves:
+                    code, cx, co, _ = canonical_masks(x | bit, o)
+                else:
+                    code, cx, co, _ = canonical_masks(x, o | bit)
+                level[code] = (cx, co)
+    return levels
+
+def solve_position(x: int, o: int, solved: dict[int, Entry]) -> Entry:
+    """
+    Return the entry of the canonical position with the provided X and O masks.
+    The entries of all its successors must be in solved.
+    """
+    # The side which just moved has won
+    if _has_won(x) or _has_won(o):
+        return (Outcome.Loss, 0, 0)
+    empty = full_mask & ~(x | o)
+    if not empty:
+        return (Outcome.Draw, 0, 0)
+    # X moves when there are as many Xs as Os
+    x_moves = popcount[x] == popcount[o]
+    best = None
+    moves = 0
+    for slot in mask_slots[empty]:
+        bit = 1 << slot
+        if x_moves:
+            child = canonical_masks(x | bit, o)[0]
         else:
-            outcome = Outcome.Win
-        _register(board, outcome)
-        return outcome
-    
-def build_first():
-    Player.Computer.assign(Symbol.X)
-    board = Board()
-    recursive_rank(board)
-    dump(registry, firstfile, 4)
-    
-def build_second():
-    registry.clear()
-    
-    board = Board()
-    Player.Computer.assign(Symbol.O)
-    recursive_rank(board)
-    dump(registry, secondfile, 4)
-    
-def build(rebuild=False):
+            child = canonical_masks(x, o | bit)[0]
+        child_outcome, _, child_depth = solved[child]
+        outcome, depth = _reversed[child_outcome], child_depth + 1
+        preference = _preference(outcome, depth)
+        if best is None or preference < best[0]:
+            best = (preference, outcome, depth)
+            moves = bit
+        elif preference == best[0]:
+            moves |= bit
+    _, outcome, depth = best
+    return (outcome, moves, depth)
+
+def retrograde_solve(x: int = 0, o: int = 0) -> dict[int, Entry]:
+    """
+    Solve every legal position reachable from the provided one (by default, the empty board)
+    bottom-up, from the full boards back to the starting position.
+
+    Return canonical code -> (outcome, best moves, depth), where the outcome is
+    from the point of view of the side to move, the best moves are a mask of
+    the slots of the canonical board reaching it, and the depth is the number
+    of plies to the end of the game. The best moves win the fastest or lose
+    the slowest.
+    """
+    levels = enumerate_positions(x, o)
+    solved = {}
+    # Each level only depends on the ones after it
+    for level in reversed(levels):
+        for code, (x, o) in level.items():
+            solved[code] = solve_position(x, o, solved)
+    return solved
+
+def parallel_solve(jobs: int) -> dict[int, Entry]:
+    """
+    Solve every legal position like retrograde_solve(), in jobs processes:
+    jobs - 1 worker processes and this one.
+
+    The positions with the same number of pieces only read the entries of the
+    positions with one more, so each level is split into one chunk per job,
+    solved from the entries of the level after it. Every position is solved once.
+    """
+    levels = enumerate_positions()
+    solved = {}
+    # The entries of the level after the one being solved
+    following = {}
+    with ProcessPoolExecutor(jobs - 1) as executor:
+        for level in reversed(levels):
+            positions = list(level.items())
+            size = -(-len(positions) // jobs) or 1
+            chunks = [positions[i:i + size] for i in range(0, len(positions), size)]
+            futures = [executor.submit(_solve_chunk, chunk, following) for chunk in chunks[1:]]
+            current = _solve_chunk(chunks[0], following) if chunks else {}
+            for future in futures:
+                current.update(future.result())
+            solved.update(current)
+            following = current
+    return dict(sorted(solved.items()))
+
+def _solve_chunk(positions: list[tuple[int, tuple[int, int]]], following: dict[int, Entry]) -> dict[int, Entry]:
+    # Solve the positions of one level, in a worker process or this one
+    return {code: solve_position(x, o, following) for code, (x, o) in positions}
+
+def expand_symmetries(solved: dict[int, Entry]) -> dict[int, Entry]:
+    """
+    Return the entries of every position, from those of the canonical positions.
+    Symmetric positions share their outcome and depth, and their best moves are
+    the canonical best moves moved by the symmetry.
+    """
+    entries = {}
+    for code in sorted(solved):
+        outcome, moves, depth = solved[code]
+        for image, image_moves in images(*decode(code), moves):
+            entries[image] = (outcome, image_moves, depth)
+    return entries
+
+def build(rebuild=False, directory=DATA_DIR, jobs=1):
+    """
+    Build the database file in the provided directory.
+    Unless rebuild is True, nothing is done if it exists already.
+    With more than one job, jobs - 1 worker processes help solve the positions.
+    """
+    path = os.path.join(directory, FILE)
     if not rebuild:
-        # Don't reload if loaded alredy
-        try: 
-            open("cpudata1.txt", "rb")
-            open("cpudata2.txt", "rb")
+        # Don't rebuild if built alredy
+        if os.path.exists(path):
             return
-        except IOError:
-            pass
-    global firstfile, secondfile
-    firstfile = open("cpudata1.txt", "wb")
-    secondfile = open("cpudata2.txt", "wb")    
-    build_first()
-    build_second()
-    
+    # One table serves both sides, its outcomes being relative to the side to move
+    if jobs > 1:
+        solved = parallel_solve(jobs)
+    else:
+        solved = retrograde_solve()
+    # Only the canonical positions are solved, but every position is written,
+    # so a board's own code is its key
+    with open(path, "wb") as file:
+        dump(expand_symmetries(solved), file)
+
+def main(argv: Optional[list[str]] = None) -> None:
+    "Build the database from the command line."
+    parser = ArgumentParser(description="Build the CPU database.")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="processes solving the positions, this one included (default: 1, no pool)")
+    parser.add_argument("--directory", default=DATA_DIR,
+                        help="directory to write the database to")
+    parser.add_argument("--check", action="store_true",
+                        help="also solve serially and check that the outputs are identical")
+    args = parser.parse_args(argv)
+    build(True, args.directory, args.jobs)
+    if args.check:
+        serial, parallel = BytesIO(), BytesIO()
+        dump(expand_symmetries(retrograde_solve()), serial)
+        dump(expand_symmetries(parallel_solve(max(args.jobs, 2))), parallel)
+        if serial.getvalue() != parallel.getvalue():
+            sys.exit("The parallel and serial databases differ")
+        print("The parallel and serial databases are identical")
+
 if __name__ == "__main__":
-    build(True)
\ No newline at end of file
+    main()
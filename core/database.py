@@ -0,0 +1,263 @@
+"Read and write the binary CPU database."
+# File: tictactoe\core\database.py
+
+from array import array
+from mmap import mmap, ACCESS_READ
+from multiprocessing.shared_memory import SharedMemory
+from struct import Struct
+from threading import Lock
+from typing import Optional
+
+import atexit
+import os
+import sys
+
+from tictactoe.core.bitboard import BitBoard, mask_slots
+from tictactoe.core.enums import *
+
+# The file format (all integers little-endian):
+#   header: magic (4 bytes), version (uint16), cell size (uint16), cell count (uint32)
+#   cells:  one uint16 per board, indexed by the board's base-3 code
+# A cell packs:
+#   bits 0-8:   the best moves, a 9-bit mask of slots
+#   bits 9-11:  the outcome's value + 1, or 0 if the board has no entry
+#               (unreachable boards); the outcome is from the point of view
+#               of the side to move
+#   bits 12-15: the depth (number of plies to the outcome), if recorded
+MAGIC = b"TTTD"
+VERSION = 3
+CELL_COUNT = 3 ** 9
+_header = Struct("<4sHHI")
+HEADER_SIZE = _header.size
+CELL_SIZE = 2
+
+_MOVES_MASK = 0x1FF
+_OUTCOME_SHIFT = 9
+_DEPTH_SHIFT = 12
+
+# The directory holding the database files
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "gui")
+# The database file
+FILE = "cpudata.bin"
+
+# Outcomes by value
+_outcomes = tuple(Outcome)
+
+def pack(outcome: Outcome, moves: int, depth: int = 0) -> int:
+    "Return the cell holding the outcome, best moves and depth."
+    return moves | (outcome.value + 1) << _OUTCOME_SHIFT | depth << _DEPTH_SHIFT
+
+def dump(entries: dict, file) -> None:
+    """
+    Write the database to the binary file object provided.
+    The entries map base-3 codes to (outcome, best moves) or (outcome, best moves, depth).
+    """
+    cells = array("H", bytes(CELL_COUNT * CELL_SIZE))
+    for code, entry in entries.items():
+        cells[code] = pack(*entry)
+    if sys.byteorder != "little":
+        cells.byteswap()
+    file.write(_header.pack(MAGIC, VERSION, CELL_SIZE, CELL_COUNT))
+    file.write(cells.tobytes())
+
+def _cells_of(buffer, name: str):
+    # Check the header of the database held by the buffer and return its cells
+    magic, version, cell_size, cell_count = _header.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{name} is not a CPU database")
+    if version != VERSION or cell_size != CELL_SIZE or cell_count != CELL_COUNT:
+        raise ValueError(f"{name} has unsupported database version {version}")
+    if len(buffer) < HEADER_SIZE + CELL_COUNT * CELL_SIZE:
+        raise ValueError(f"{name} is truncated")
+    cells = memoryview(buffer)[HEADER_SIZE:HEADER_SIZE + CELL_COUNT * CELL_SIZE]
+    if sys.byteorder == "little":
+        # Zero-copy view of the cells
+        return cells.cast("H")
+    cells.release()
+    return _SwappedCells(buffer)
+
+class Database(object):
+    """
+    A read-only CPU database, memory-mapped from its file.
+
+    Maps the base-3 codes of boards to (outcome, best moves) tuples,
+    reading the cells in place instead of loading the file. The entries are
+    from the point of view of the side to move, whichever symbol it has.
+    """
+
+    __slots__ = "_file", "_map", "_cells"
+
+    def __new__(cls, path: str):
+        self = object.__new__(cls)
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+            self._cells = _cells_of(self._map, path)
+        except BaseException:
+            if hasattr(self, "_map"):
+                self._map.close()
+            self._file.close()
+            raise
+        return self
+
+    def __init__(self, path: str):
+        pass
+
+    def __getitem__(self, code: int) -> tuple[Outcome, int]:
+        cell = self._cells[code]
+        outcome = cell >> _OUTCOME_SHIFT & 0b111
+        if not outcome:
+            raise KeyError(code)
+        return (_outcomes[outcome - 1], cell & _MOVES_MASK)
+
+    def __contains__(self, code: int) -> bool:
+        return 0 <= code < CELL_COUNT and bool(self._cells[code] >> _OUTCOME_SHIFT & 0b111)
+
+    def best_slots(self, board: BitBoard) -> list[int]:
+        "Return the best slots of the board for the side to move."
+        _, moves = self[board.code]
+        return list(mask_slots[moves])
+
+    def depth(self, code: int) -> int:
+        "Return the depth recorded for the board with the provided code."
+        return self._cells[code] >> _DEPTH_SHIFT
+
+    def close(self) -> None:
+        "Release the memory map and its file."
+        if isinstance(self._cells, memoryview):
+            self._cells.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class SharedDatabase(Database):
+    """
+    A read-only CPU database held in shared memory, for worker processes.
+
+    The parent copies the database into a shared memory block once, with create();
+    each worker attaches to the block by its name, a zero-copy view with
+    nothing to unpickle, so memory stays constant however many workers there are.
+    Only the creator unlinks the block, on close(). Workers must be started by
+    the creator (as a process pool's are), to share its resource tracker.
+    """
+
+    __slots__ = "_memory", "_owner"
+
+    def __new__(cls, name: str):
+        self = object.__new__(cls)
+        self._memory = SharedMemory(name)
+        self._owner = False
+        try:
+            self._cells = _cells_of(self._memory.buf, name)
+        except BaseException:
+            self._memory.close()
+            raise
+        return self
+
+    def __init__(self, name: str):
+        pass
+
+    @classmethod
+    def create(cls, path: Optional[str] = None) -> "SharedDatabase":
+        """
+        Copy the database file at the path (by default, that of get_database(),
+        built if missing) into a new shared memory block and return the database held by it.
+        """
+        if path is None:
+            get_database()
+            path = os.path.join(DATA_DIR, FILE)
+        with open(path, "rb") as file:
+            data = file.read()
+        memory = SharedMemory(create=True, size=len(data))
+        try:
+            memory.buf[:len(data)] = data
+            self = cls(memory.name)
+        except BaseException:
+            memory.close()
+            memory.unlink()
+            raise
+        # The database holds its own handle to the block
+        memory.close()
+        self._owner = True
+        return self
+
+    @property
+    def name(self) -> str:
+        "The name of the shared memory block, for workers to attach to."
+        return self._memory.name
+
+    def close(self) -> None:
+        "Release the view of the block, and unlink the block if this process created it."
+        if isinstance(self._cells, memoryview):
+            self._cells.release()
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+
+class _SwappedCells(object):
+    # Cell access for big-endian machines, where the cells can't be cast in place
+    __slots__ = "_map",
+
+    def __init__(self, map):
+        self._map = map
+
+    def __getitem__(self, code: int) -> int:
+        if not 0 <= code < CELL_COUNT:
+            raise IndexError("cell index out of range")
+        offset = HEADER_SIZE + code * CELL_SIZE
+        return int.from_bytes(self._map[offset:offset + CELL_SIZE], "little")
+
+## The process-wide database
+_database: Optional[Database] = None
+_lock = Lock()
+
+def get_database() -> Database:
+    """
+    Return the CPU database.
+
+    The database is opened (and built, if its file is missing) on first use,
+    then shared by every later game in the process. Safe to call from any thread.
+    """
+    global _database
+    database = _database
+    if database is None:
+        with _lock:
+            database = _database
+            if database is None:
+                # The builder imports this module
+                from tictactoe.core.cpu_database_builder import build
+                build(False)
+                database = _database = Database(os.path.join(DATA_DIR, FILE))
+    return database
+
+@atexit.register
+def close_database() -> None:
+    "Close the database opened by get_database(), if any."
+    global _database
+    with _lock:
+        if _database is not None:
+            _database.close()
+            _database = None
+
+def share_database() -> SharedDatabase:
+    """
+    Copy the CPU database into shared memory and return it, for the parent of worker processes.
+    Pass its name to attach_database() in each worker, and close it once the workers are done.
+    """
+    return SharedDatabase.create()
+
+def attach_database(name: str) -> None:
+    """
+    Make the shared database with the provided name the one get_database() returns in this process.
+    Meant as the initializer of worker processes, such as those of a ProcessPoolExecutor.
+    """
+    global _database
+    with _lock:
+        if _database is not None:
+            _database.close()
+        _database = SharedDatabase(name)
@@ -0,0 +1,247 @@
+"A negamax alpha-beta engine for MNKBoard, with iterative deepening and a transposition table."
+# File: tictactoe\core\engine.py
+
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Optional
+
+from tictactoe.core.mnk import MNKBoard, popcount
+
+# Scores are from the point of view of the side to move.
+# A won game scores WIN minus the plies to the win, so faster wins score higher.
+WIN = 1_000_000
+# Scores beyond this are wins or losses, not evaluations
+_WIN_BOUND = WIN - 10_000
+
+# The kinds of transposition table scores
+EXACT, LOWER, UPPER = range(3)
+
+class _Timeout(Exception):
+    # Raised inside the search when the time budget is spent
+    pass
+
+class TranspositionTable(object):
+    """
+    A transposition table holding at most capacity entries.
+
+    The table is a fixed array indexed by the low bits of the position hash.
+    A new entry replaces the one in its slot if that one is from an earlier
+    search or was searched no deeper, so deep results of the current search survive.
+    """
+
+    __slots__ = "capacity", "generation", "_mask", "_entries"
+
+    def __init__(self, capacity: int = 1 << 18):
+        # Round the capacity down to a power of 2
+        self.capacity = 1 << (max(capacity, 1).bit_length() - 1)
+        self.generation = 0
+        self._mask = self.capacity - 1
+        self._entries = [None] * self.capacity
+
+    def new_search(self) -> None:
+        "Age the entries, so those of earlier searches get replaced first."
+        self.generation += 1
+
+    def get(self, key: int) -> Optional[tuple]:
+        "Return the (key, depth, kind, score, move, generation) entry of the key, if any."
+        entry = self._entries[key & self._mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def put(self, key: int, depth: int, kind: int, score: int, move: Optional[int]) -> None:
+        "Store a search result, following the replacement policy."
+        index = key & self._mask
+        old = self._entries[index]
+        if old is None or old[0] == key or old[5] != self.generation or depth >= old[1]:
+            self._entries[index] = (key, depth, kind, score, move, self.generation)
+
+    def clear(self) -> None:
+        self._entries = [None] * self.capacity
+
+    def __len__(self) -> int:
+        return self.capacity - self._entries.count(None)
+
+@dataclass
+class SearchResult(object):
+    """
+    The result of a search.
+    """
+    __slots__ = 'move', 'score', 'depth', 'nodes', 'elapsed'
+
+    move: Optional[int] # The best move found
+    score: int # Its score, from the side to move's point of view
+    depth: int # The depth of the last completed iteration
+    nodes: int # The number of nodes searched
+    elapsed: float # The time taken, in seconds
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.elapsed if self.elapsed else 0.0
+
+class AlphaBetaEngine(object):
+    """
+    Negamax alpha-beta search with iterative deepening, for boards too big for the database.
+
+    Each call to search() deepens until the time budget is spent (or the game is solved)
+    and returns the best move of the deepest completed iteration.
+    This is the engine behind Level.Impossible on such boards.
+    """
+
+    __slots__ = "budget", "table", "_deadline", "_nodes"
+
+    # How many nodes are searched between two looks at the clock. Each engine sets its
+    # own, so the budget is overrun by about the same time (here, 1024 nodes of ~8 us)
+    clock_interval = 1024
+
+    def __init__(self, budget: float = 1.0, table_capacity: int = 1 << 18):
+        self.budget = budget # Seconds per move
+        self.table = TranspositionTable(table_capacity)
+        self._deadline = 0.0
+        self._nodes = 0
+
+    def evaluate(self, board: MNKBoard) -> int:
+        """
+        Return a heuristic score of the board for the side to move.
+        Every line still open to only one symbol counts for that symbol,
+        more so the more of its symbols it holds.
+        """
+        x, o = board.x, board.o
+        score = 0
+        for line in board.geometry.lines:
+            x_count = popcount(x & line)
+            o_count = popcount(o & line)
+            # An empty line is open to both symbols, so it counts for neither
+            if x_count and not o_count:
+                score += 1 << (2 * x_count)
+            elif o_count and not x_count:
+                score -= 1 << (2 * o_count)
+        # X moves when the piece count is even
+        return -score if board.pieces & 1 else score
+
+    def search(self, board: MNKBoard, budget: Optional[float] = None,
+               max_depth: Optional[int] = None) -> SearchResult:
+        """
+        Search the board, which must be undecided, for the best move of the side to move.
+        The board is searched in place and left as it was.
+        """
+        start = perf_counter()
+        self._deadline = start + (self.budget if budget is None else budget)
+        self._nodes = 0
+        self.table.new_search()
+        empties = board.geometry.size - board.pieces
+        max_depth = empties if max_depth is None else min(max_depth, empties)
+        # Fall back on the first move in search order if no iteration completes
+        taken = board.x | board.o
+        best = SearchResult(next(slot for slot in board.geometry.order if not taken >> slot & 1),
+                            0, 0, 0, 0.0)
+        depth = 1
+        while depth <= max_depth:
+            try:
+                score, move = self._root(board, depth)
+            except _Timeout:
+                break
+            best = SearchResult(move, score, depth, self._nodes, 0.0)
+            # Stop once the game is solved
+            if abs(score) > _WIN_BOUND:
+                break
+            depth += 1
+        best.nodes = self._nodes
+        best.elapsed = perf_counter() - start
+        return best
+
+    def choose_move(self, board: MNKBoard) -> int:
+        "Return the best move found for the side to move within the time budget."
+        return self.search(board).move
+
+    def _ordered_moves(self, board: MNKBoard, first: Optional[int]) -> list[int]:
+        # The empty slots from the centre outwards, with the table's move first
+        taken = board.x | board.o
+        moves = [slot for slot in board.geometry.order if not taken >> slot & 1]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def _root_moves(self, board: MNKBoard, first: Optional[int]) -> list[int]:
+        # The moves searched at the root, in order
+        return self._ordered_moves(board, first)
+
+    def _root(self, board: MNKBoard, depth: int) -> tuple[int, int]:
+        # Search the root, returning the best score and move
+        entry = self.table.get(board.hash)
+        alpha, beta = -WIN - 1, WIN + 1
+        best_move = None
+        for move in self._root_moves(board, entry[4] if entry else None):
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, 1)
+            finally:
+                board.pop()
+            if score > alpha:
+                alpha, best_move = score, move
+        self.table.put(board.hash, depth, EXACT, alpha, best_move)
+        return alpha, best_move
+
+    def _negamax(self, board: MNKBoard, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self._nodes += 1
+        if not self._nodes % self.clock_interval and perf_counter() > self._deadline:
+            raise _Timeout
+        # The side which just moved has won
+        if board.is_won():
+            return -(WIN - ply)
+        if board.pieces == board.geometry.size:
+            return 0
+        if depth <= 0:
+            return self.evaluate(board)
+        # Probe the table; win scores are stored relative to the node
+        original_alpha = alpha
+        entry = self.table.get(board.hash)
+        table_move = None
+        if entry is not None:
+            _, entry_depth, kind, score, table_move, _ = entry
+            if entry_depth >= depth:
+                score = _from_table(score, ply)
+                if kind == EXACT:
+                    return score
+                if kind == LOWER and score >= beta:
+                    return score
+                if kind == UPPER and score <= alpha:
+                    return score
+        best_score, best_move = -WIN - 1, None
+        for move in self._ordered_moves(board, table_move):
+            board.push(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.pop()
+            if score > best_score:
+                best_score, best_move = score, move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        if best_score <= original_alpha:
+            kind = UPPER
+        elif best_score >= beta:
+            kind = LOWER
+        else:
+            kind = EXACT
+        self.table.put(board.hash, depth, kind, _to_table(best_score, ply), best_move)
+        return best_score
+
+def _to_table(score: int, ply: int) -> int:
+    # Make a win score relative to the node instead of the root
+    if score > _WIN_BOUND:
+        return score + ply
+    if score < -_WIN_BOUND:
+        return score - ply
+    return score
+
+def _from_table(score: int, ply: int) -> int:
+    # Make a win score from the table relative to the root again
+    if score > _WIN_BOUND:
+        return score - ply
+    if score < -_WIN_BOUND:
+        return score + ply
+    return score
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 from enum import Enum
+from typing import Optional
 
 class Symbol(Enum):
     """
@@ -10,8 +11,6 @@ class Symbol(Enum):
     """
     X, O = range(2)
     
-    __slots__ = 'player', 
-    
     def opposite(self) -> Symbol:
         "Return the other symbol."
         return Symbol.O if self is Symbol.X else Symbol.X
@@ -26,26 +25,59 @@ class Player(Enum):
         1) the user (the human player of the game)
         2) the computer (the automated opponent)
     """
-    __slots__ = 'symbol', 
-    
     User, Computer = range(2)
     
-    def assign(self, symbol: Symbol) -> None:
-        """
-        Assign a symbol to both players.
-        Assign the provided symbol to the provided player while
-        assigning the other symbol to the other player.
-        """
-        self.symbol = symbol
-        symbol.player = self
-        other = self.opposite()
-        other.symbol = self.symbol.opposite()
-        self.symbol.opposite().player = other
-    
     def opposite(self):
         "Return the other player."
         return Player.User if self is Player.Computer else Player.Computer
     
+class Assignment(object):
+    """
+    The symbols of the players in one game: the user has one, the computer the other.
+    
+    Each game holds its own assignment and passes it to the board methods
+    answering in terms of players (winner(), rank() and turn()), so games with
+    different assignments can run side by side, in threads or an asyncio server.
+    """
+    __slots__ = 'user', 'computer'
+    
+    def __new__(cls, user: Symbol):
+        self = object.__new__(cls)
+        self.user = user
+        self.computer = user.opposite()
+        return self
+    
+    def __init__(self, user: Symbol):
+        pass
+    
+    def symbol(self, player: Player) -> Symbol:
+        "Return the symbol of the player."
+        return self.user if player is Player.User else self.computer
+    
+    def player(self, symbol: Symbol) -> Player:
+        "Return the player with the symbol."
+        return Player.User if symbol is self.user else Player.Computer
+    
+    def outcome(self, symbol: Optional[Symbol], finished: bool) -> Outcome:
+        """
+        Return the outcome, from the computer's perspective, of a board 
+        won by the side with the symbol (None for no winner), which is finished or not.
+        """
+        if symbol is None:
+            return Outcome.Draw if finished else Outcome.Undetermined
+        return Outcome.Win if symbol is self.computer else Outcome.Loss
+    
+    def __eq__(self, other):
+        if isinstance(other, Assignment):
+            return self.user is other.user
+        return NotImplemented
+    
+    def __hash__(self):
+        return hash(self.user)
+    
+    def __repr__(self):
+        return f"Assignment(user={self.user})"
+    
 class Outcome(Enum):
     """
     The possible outcomes of a Tic-Tac-Toe game.
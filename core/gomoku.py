@@ -0,0 +1,358 @@
+"Define Gomoku, five in a row on a big board: the GomokuBoard class and its engine."
+# File: tictactoe\core\gomoku.py
+
+from functools import lru_cache
+from time import perf_counter
+from typing import Optional
+
+from tictactoe.core.engine import WIN, AlphaBetaEngine, SearchResult
+from tictactoe.core.mnk import MNKBoard
+
+# The board of standard Gomoku
+ROWS, COLUMNS, K = 15, 15, 5
+
+# How far from a stone (in rows or columns) the candidate moves are
+_REACH = 2
+
+@lru_cache(maxsize=None)
+def _neighbourhoods(rows: int, columns: int) -> tuple[int, ...]:
+    # The mask of the cells within reach of each cell
+    masks = []
+    for slot in range(rows * columns):
+        row, column = divmod(slot, columns)
+        mask = 0
+        for r in range(max(row - _REACH, 0), min(row + _REACH + 1, rows)):
+            for c in range(max(column - _REACH, 0), min(column + _REACH + 1, columns)):
+                mask |= 1 << (r * columns + c)
+        masks.append(mask)
+    return tuple(masks)
+
+class GomokuBoard(MNKBoard):
+    """
+    A Gomoku board: an MNKBoard, 15x15 and won with 5 in a row by default,
+    which keeps the patterns of its stones up to date on every push() and pop().
+
+    A window is a line of k cells. Each side's stones are counted on every window,
+    and the windows holding stones of one side only are counted by how many:
+    open twos, threes and fours. The windows one and two stones short of a line
+    are also kept, for the threat search. The cells near the stones
+    (the candidate moves) are kept as a mask. A move updates only the windows through it.
+    """
+
+    __slots__ = "counts", "patterns", "fours", "threes", "_near", "_neighbourhoods"
+
+    def __new__(cls, rows: int = ROWS, columns: int = COLUMNS, k: int = K):
+        self = MNKBoard.__new__(cls, rows, columns, k)
+        windows = len(self.geometry.lines)
+        # The stones of X and of O on each window
+        self.counts = ([0] * windows, [0] * windows)
+        # The number of windows holding c stones of X only (self.patterns[0][c]) and of O only
+        self.patterns = ([0] * (k + 1), [0] * (k + 1))
+        # The windows holding k - 1 and k - 2 stones of X only (index 0) and of O only
+        self.fours = (set(), set())
+        self.threes = (set(), set())
+        # The mask of the cells near a stone, after each move
+        self._near = [0]
+        self._neighbourhoods = _neighbourhoods(rows, columns)
+        return self
+
+    def __init__(self, rows: int = ROWS, columns: int = COLUMNS, k: int = K):
+        pass
+
+    def __copy__(self):
+        other = MNKBoard.__copy__(self)
+        other.counts = (self.counts[0].copy(), self.counts[1].copy())
+        other.patterns = (self.patterns[0].copy(), self.patterns[1].copy())
+        other.fours = (self.fours[0].copy(), self.fours[1].copy())
+        other.threes = (self.threes[0].copy(), self.threes[1].copy())
+        other._near = self._near.copy()
+        other._neighbourhoods = self._neighbourhoods
+        return other
+
+    @classmethod
+    def from_string(cls, strobj: str, rows: int = ROWS, columns: int = COLUMNS, k: int = K):
+        self = super().from_string(strobj, rows, columns, k)
+        # Count the stones placed
+        near = 0
+        for slot in range(self.geometry.size):
+            if self.x >> slot & 1:
+                self._count(slot, 0)
+            elif self.o >> slot & 1:
+                self._count(slot, 1)
+            else:
+                continue
+            near |= self._neighbourhoods[slot]
+        self._near[0] = near
+        return self
+
+    ## Pattern counting
+    def _track(self, side: int, window: int, count: int, add: bool) -> None:
+        # Add or remove the window, holding count stones of the side only, from the sets kept
+        k = self.geometry.k
+        if count == k - 1:
+            windows = self.fours[side]
+        elif count == k - 2:
+            windows = self.threes[side]
+        else:
+            return
+        if add:
+            windows.add(window)
+        else:
+            windows.discard(window)
+
+    def _count(self, slot: int, side: int) -> None:
+        # Count a stone of the side (0 for X, 1 for O) on the windows through the slot
+        own_counts, other_counts = self.counts[side], self.counts[1 - side]
+        own_patterns, other_patterns = self.patterns[side], self.patterns[1 - side]
+        tracked = self.geometry.k - 3
+        for i in self.geometry.lines_through[slot]:
+            own = own_counts[i]
+            other = other_counts[i]
+            if not other:
+                if own:
+                    own_patterns[own] -= 1
+                own_patterns[own + 1] += 1
+                if own >= tracked:
+                    self._track(side, i, own, False)
+                    self._track(side, i, own + 1, True)
+            elif not own:
+                # The window is no longer the other side's only
+                other_patterns[other] -= 1
+                if other > tracked:
+                    self._track(1 - side, i, other, False)
+            own_counts[i] = own + 1
+
+    def _uncount(self, slot: int, side: int) -> None:
+        # Undo _count()
+        own_counts, other_counts = self.counts[side], self.counts[1 - side]
+        own_patterns, other_patterns = self.patterns[side], self.patterns[1 - side]
+        tracked = self.geometry.k - 3
+        for i in self.geometry.lines_through[slot]:
+            own = own_counts[i] - 1
+            other = other_counts[i]
+            if not other:
+                own_patterns[own + 1] -= 1
+                if own:
+                    own_patterns[own] += 1
+                if own >= tracked:
+                    self._track(side, i, own + 1, False)
+                    self._track(side, i, own, True)
+            elif not own:
+                other_patterns[other] += 1
+                if other > tracked:
+                    self._track(1 - side, i, other, True)
+            own_counts[i] = own
+
+    ## Making and unmaking moves
+    def push(self, slot: int) -> None:
+        "Play the symbol of the side to move on the empty slot."
+        side = self.pieces & 1
+        super().push(slot)
+        self._count(slot, side)
+        self._near.append(self._near[-1] | self._neighbourhoods[slot])
+
+    def pop(self) -> int:
+        "Unmake the last move played with push() and return its slot."
+        slot = super().pop()
+        self._uncount(slot, self.pieces & 1)
+        self._near.pop()
+        return slot
+
+    ## Patterns
+    def threats(self, side: int) -> list[int]:
+        "Return the empty cells on which the side (0 for X, 1 for O) would complete a line."
+        combos = self.geometry.combos
+        taken = self.x | self.o
+        cells = []
+        for i in self.fours[side]:
+            cell = next(cell for cell in combos[i] if not taken >> cell & 1)
+            if cell not in cells:
+                cells.append(cell)
+        return cells
+
+    def candidates(self) -> list[int]:
+        "Return the empty cells near a stone, or the centre of an empty board."
+        near = self._near[-1] & ~(self.x | self.o)
+        if not self.pieces:
+            return [self.geometry.order[0]]
+        cells = []
+        while near:
+            low = near & -near
+            cells.append(low.bit_length() - 1)
+            near ^= low
+        return cells
+
+# The value of a window holding c stones of one side only
+_weights = (0, 1, 12, 150, 2000, 50000)
+
+class GomokuEngine(AlphaBetaEngine):
+    """
+    An alpha-beta engine for Gomoku.
+
+    A search first looks for a forced win by threat-space search: every move
+    makes a four, which the opponent must block, until a move makes two fours
+    at once. Otherwise it deepens an alpha-beta search over the best candidate
+    moves near the stones, evaluating each position from its pattern counts.
+    """
+
+    __slots__ = "width", "threat_depth", "_threat_deadline", "_failed", "_safe"
+
+    def __init__(self, budget: float = 1.0, table_capacity: int = 1 << 18, width: int = 12,
+                 threat_depth: int = 12):
+        super().__init__(budget, table_capacity)
+        self.width = width # The number of candidate moves searched per node
+        self.threat_depth = threat_depth # Fours per forced win searched, at most
+        self._threat_deadline = 0.0
+        # The (hash, attacker, depth) of the positions with no forced win found
+        self._failed = set()
+        # The root moves searched
+        self._safe = []
+
+    def evaluate(self, board: GomokuBoard) -> int:
+        """
+        Return a heuristic score of the board for the side to move,
+        from the pattern counts: each window open to one side only counts
+        for that side, more so the more stones it holds.
+        """
+        side = board.pieces & 1
+        own, other = board.patterns[side], board.patterns[1 - side]
+        k = board.geometry.k
+        score = 0
+        for count in range(1, k):
+            score += _weights[count] * (own[count] - other[count])
+        # A four of the side to move wins next move
+        if own[k - 1]:
+            score += _weights[k]
+        return score
+
+    def cell_score(self, board: GomokuBoard, cell: int, side: int) -> int:
+        "Return the heuristic value of the empty cell to the side (0 for X, 1 for O)."
+        own, other = board.counts[side], board.counts[1 - side]
+        score = 0
+        for i in board.geometry.lines_through[cell]:
+            if not other[i]:
+                score += _weights[own[i] + 1]
+            elif not own[i]:
+                score += _weights[other[i]]
+        return score
+
+    def _ordered_moves(self, board: GomokuBoard, first: Optional[int]) -> list[int]:
+        # Win if possible, else block, else the best candidates, with the table's move first
+        side = board.pieces & 1
+        threats = board.threats(side)
+        if threats:
+            return threats[:1]
+        threats = board.threats(1 - side)
+        if threats:
+            return threats[:1]
+        moves = sorted(board.candidates(), key=lambda cell: -self.cell_score(board, cell, side))
+        moves = moves[:self.width]
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    ## Threat-space search
+    def forced_win(self, board: GomokuBoard, depth: int) -> Optional[int]:
+        """
+        Return the first move of a forced win of the side to move by at most depth fours,
+        or None if none is found. The board is searched in place and left as it was.
+        """
+        self._nodes += 1
+        if perf_counter() > self._threat_deadline:
+            return None
+        side = board.pieces & 1
+        threats = board.threats(side)
+        if threats:
+            return threats[0]
+        defences = board.threats(1 - side)
+        # Two fours of the opponent can't both be blocked
+        if len(defences) > 1 or depth <= 0:
+            return None
+        key = (board.hash, side, depth)
+        if key in self._failed:
+            return None
+        # The cells making a four: the empty cells of the windows holding k - 2 of the side's
+        combos = board.geometry.combos
+        taken = board.x | board.o
+        candidates = []
+        for i in board.threes[side]:
+            for cell in combos[i]:
+                if not taken >> cell & 1 and cell not in candidates:
+                    candidates.append(cell)
+        # A four of the opponent must be blocked first
+        if defences:
+            candidates = [cell for cell in candidates if cell == defences[0]]
+        for cell in candidates:
+            board.push(cell)
+            blocks = board.threats(side)
+            if len(blocks) > 1:
+                # Two fours at once: the opponent can block only one
+                board.pop()
+                return cell
+            found = False
+            if blocks:
+                board.push(blocks[0])
+                # The block may complete a line of the opponent's own
+                if not board.is_won():
+                    found = self.forced_win(board, depth - 1) is not None
+                board.pop()
+            board.pop()
+            if found:
+                return cell
+        self._failed.add(key)
+        return None
+
+    def _refuted(self, board: GomokuBoard, move: int) -> bool:
+        # Return if the opponent has a forced win after the move
+        board.push(move)
+        try:
+            if board.is_won():
+                return False
+            for depth in range(1, self.threat_depth + 1):
+                if self.forced_win(board, depth) is not None:
+                    return True
+                if perf_counter() > self._threat_deadline:
+                    break
+            return False
+        finally:
+            board.pop()
+
+    def _root_moves(self, board: GomokuBoard, first: Optional[int]) -> list[int]:
+        # The moves not refuted by threat-space search, with the table's move first
+        moves = self._safe.copy()
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def search(self, board: GomokuBoard, budget: Optional[float] = None,
+               max_depth: Optional[int] = None) -> SearchResult:
+        """
+        Search the board, which must be undecided, for the best move of the side to move.
+        The board is searched in place and left as it was.
+
+        Up to a third of the time budget goes to the threat-space search:
+        for a forced win of the side to move, then for forced wins of the opponent
+        after each candidate move, which the alpha-beta search then leaves out
+        (unless they all lose).
+        """
+        start = perf_counter()
+        budget = self.budget if budget is None else budget
+        self._threat_deadline = start + budget / 3
+        self._nodes = 0
+        self._failed.clear()
+        for depth in range(1, self.threat_depth + 1):
+            move = self.forced_win(board, depth)
+            if move is not None:
+                nodes = self._nodes
+                return SearchResult(move, WIN - 2 * depth + 1, depth, nodes, perf_counter() - start)
+            if perf_counter() > self._threat_deadline:
+                break
+        moves = self._ordered_moves(board, None)
+        self._safe = [move for move in moves if not self._refuted(board, move)] or moves
+        nodes = self._nodes
+        result = super().search(board, budget - (perf_counter() - start), max_depth)
+        result.nodes += nodes
+        result.elapsed = perf_counter() - start
+        return result
@@ -0,0 +1,251 @@
+"A Monte Carlo tree search engine, with UCT selection, tree reuse and playouts on a process pool."
+# File: tictactoe\core\mcts.py
+
+from concurrent.futures import ProcessPoolExecutor
+from copy import copy
+from dataclasses import dataclass
+from math import log, sqrt
+from random import Random
+from time import perf_counter
+from typing import Optional
+
+# The UCT exploration constant: the theoretical sqrt(2) for results between 0 and 1
+EXPLORATION = sqrt(2)
+
+class Node(object):
+    """
+    A node of the search tree: the position reached by playing its move from its parent.
+
+    wins is the sum of the playout results from the point of view of the side
+    which played the move (1 for a win, 0.5 for a draw, 0 for a loss).
+    """
+
+    __slots__ = "move", "parent", "children", "untried", "visits", "wins"
+
+    def __init__(self, move: Optional[int], parent: Optional["Node"], untried: list[int]):
+        self.move = move
+        self.parent = parent
+        self.children: list[Node] = []
+        self.untried = untried # The moves with no child yet
+        self.visits = 0
+        self.wins = 0.0
+
+    def child(self, move: int) -> Optional["Node"]:
+        "Return the child of the move, if it was expanded."
+        for child in self.children:
+            if child.move == move:
+                return child
+        return None
+
+def _untried(board, rng: Random) -> list[int]:
+    # The moves of a new node, in random order so expanding pops a random one
+    if board.is_won():
+        return []
+    moves = board.available_slots()
+    rng.shuffle(moves)
+    return moves
+
+def _grow(root: Node, board, deadline: float, limit: Optional[int], rng: Random,
+          exploration: float) -> int:
+    # Grow the tree of the board's position, left as it was, with playouts
+    # until the deadline or the playout limit. Return the number of playouts.
+    playouts = 0
+    while (limit is None or playouts < limit) and perf_counter() < deadline:
+        node = root
+        depth = 0
+        # Selection: descend through fully expanded nodes by UCT
+        while not node.untried and node.children:
+            scale = exploration * sqrt(log(node.visits))
+            best, best_score = None, -1.0
+            for child in node.children:
+                score = child.wins / child.visits + scale / sqrt(child.visits)
+                if score > best_score:
+                    best, best_score = child, score
+            node = best
+            board.push(node.move)
+            depth += 1
+        # Expansion: add one child for an untried move
+        if node.untried:
+            move = node.untried.pop()
+            board.push(move)
+            depth += 1
+            child = Node(move, node, _untried(board, rng))
+            node.children.append(child)
+            node = child
+        # Simulation: random moves until the game ends
+        plies = 0
+        while True:
+            if board.is_won():
+                # The side which moved last won: the node's side if plies is even
+                result = 0.0 if plies & 1 else 1.0
+                break
+            moves = board.available_slots()
+            if not moves:
+                result = 0.5
+                break
+            board.push(rng.choice(moves))
+            plies += 1
+        for _ in range(plies + depth):
+            board.pop()
+        # Backpropagation: the result flips from one side to the other at each level
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = 1.0 - result
+            node = node.parent
+        playouts += 1
+    return playouts
+
+def _root_stats(root: Node) -> dict[int, tuple[int, float]]:
+    # The visits and wins of each root move
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+def _search_worker(board, budget: Optional[float], limit: Optional[int], exploration: float,
+                   seed: int) -> tuple[dict[int, tuple[int, float]], int]:
+    # Grow an independent tree in a worker process, returning its root statistics
+    # and the number of playouts
+    rng = Random(seed)
+    deadline = float("inf") if budget is None else perf_counter() + budget
+    root = Node(None, None, _untried(board, rng))
+    playouts = _grow(root, board, deadline, limit, rng, exploration)
+    return _root_stats(root), playouts
+
+@dataclass
+class MCTSResult(object):
+    """
+    The result of a search.
+    """
+    __slots__ = 'move', 'visits', 'win_rate', 'playouts', 'elapsed'
+
+    move: Optional[int] # The most visited move
+    visits: int # Its number of visits
+    win_rate: float # Its mean playout result, from the side to move's point of view
+    playouts: int # The number of playouts, over all processes
+    elapsed: float # The time taken, in seconds
+
+    @property
+    def playouts_per_second(self) -> float:
+        return self.playouts / self.elapsed if self.elapsed else 0.0
+
+class MCTSEngine(object):
+    """
+    Monte Carlo tree search with UCT selection and random playouts,
+    for boards whose game tree is too big to search exhaustively.
+
+    Works on any board with push(), pop(), is_won(), available_slots() and moves,
+    such as MNKBoard. The tree of the last search is kept, and the next search
+    of a position reached from it by the moves since starts from the matching subtree.
+
+    With jobs > 1, the search is root-parallel: jobs - 1 worker processes each grow
+    an independent tree from the position while this process grows the kept one,
+    and the visits of the root moves are summed. The pool lives until close().
+    """
+
+    __slots__ = ("budget", "playouts", "jobs", "exploration", "_rng", "_executor",
+                 "_root", "_root_moves", "_root_key")
+
+    def __init__(self, budget: Optional[float] = 1.0, playouts: Optional[int] = None,
+                 jobs: int = 1, exploration: float = EXPLORATION, seed: Optional[int] = None):
+        if budget is None and playouts is None:
+            raise ValueError("the search needs a time budget or a playout budget")
+        self.budget = budget # Seconds per move
+        self.playouts = playouts # Playouts per move, over all processes
+        self.jobs = max(jobs, 1)
+        self.exploration = exploration
+        self._rng = Random(seed)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # The kept tree, the moves played to reach its position and the position's string form
+        self._root: Optional[Node] = None
+        self._root_moves: tuple[int, ...] = ()
+        self._root_key: Optional[str] = None
+
+    def _reuse(self, board) -> Optional[Node]:
+        # Return the node of the kept tree for the board's position, if there is one
+        if self._root is None:
+            return None
+        moves = board.moves
+        count = len(self._root_moves)
+        if len(moves) < count or moves[:count] != self._root_moves:
+            return None
+        # The position before the moves since must be the kept one
+        later = moves[count:]
+        for _ in later:
+            board.pop()
+        key = repr(board)
+        for move in later:
+            board.push(move)
+        if key != self._root_key:
+            return None
+        node = self._root
+        for move in later:
+            node = node.child(move)
+            if node is None:
+                return None
+        return node
+
+    def search(self, board, budget: Optional[float] = None,
+               playouts: Optional[int] = None) -> MCTSResult:
+        """
+        Search the board, which must be undecided, for the best move of the side to move.
+        The board is searched in place and left as it was.
+
+        The search stops when the time budget is spent or the playout budget
+        reached, whichever comes first; either may be None for no limit.
+        """
+        start = perf_counter()
+        budget = self.budget if budget is None else budget
+        playouts = self.playouts if playouts is None else playouts
+        deadline = float("inf") if budget is None else start + budget
+        root = self._reuse(board)
+        if root is None:
+            root = Node(None, None, _untried(board, self._rng))
+        # Free the rest of the kept tree
+        root.parent = None
+        # Share the playout budget between the processes
+        limit = None if playouts is None else -(-playouts // self.jobs)
+        futures = []
+        if self.jobs > 1:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.jobs - 1)
+            # The arguments are pickled later, by the pool's thread, while this process
+            # grows its tree on the board: the workers get a copy left untouched
+            snapshot = copy(board)
+            futures = [self._executor.submit(_search_worker, snapshot, budget, limit, self.exploration,
+                                             self._rng.getrandbits(64))
+                       for _ in range(self.jobs - 1)]
+        total = _grow(root, board, deadline, limit, self._rng, self.exploration)
+        stats = {move: list(value) for move, value in _root_stats(root).items()}
+        for future in futures:
+            worker_stats, worker_playouts = future.result()
+            total += worker_playouts
+            for move, (visits, wins) in worker_stats.items():
+                value = stats.setdefault(move, [0, 0.0])
+                value[0] += visits
+                value[1] += wins
+        self._root, self._root_moves, self._root_key = root, board.moves, repr(board)
+        elapsed = perf_counter() - start
+        if not stats:
+            # Not one playout finished: fall back on any move
+            return MCTSResult(board.available_slots()[0], 0, 0.0, total, elapsed)
+        move, (visits, wins) = max(stats.items(), key=lambda item: item[1][0])
+        return MCTSResult(move, visits, wins / visits, total, elapsed)
+
+    def choose_move(self, board) -> int:
+        "Return the most visited move for the side to move within the budget."
+        return self.search(board).move
+
+    def reset(self) -> None:
+        "Forget the kept tree."
+        self._root, self._root_moves, self._root_key = None, (), None
+
+    def close(self) -> None:
+        "Shut the process pool down, if started."
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,254 @@
+"Define the MNKBoard class: a rows-by-columns board won with k symbols in a row."
+# File: tictactoe\core\mnk.py
+
+from functools import lru_cache
+from random import Random
+from typing import Optional
+
+from tictactoe.core.bitboard import MoveStack
+from tictactoe.core.board import _board_symbol, _elem_str
+from tictactoe.core.enums import *
+
+# The named variants: rows, columns and the number of symbols in a row needed to win
+VARIANTS = {
+    "3x3": (3, 3, 3),
+    "4x4": (4, 4, 4),
+    "5x5": (5, 5, 4),
+    "7x7": (7, 7, 5),
+}
+
+# Number of set bits of a mask
+popcount = getattr(int, "bit_count", None) or (lambda mask: bin(mask).count("1"))
+
+class Geometry(object):
+    """
+    The lines of a rows-by-columns board won with k in a row, shared by all boards of that shape.
+
+    Slot i is on row i // columns and column i % columns.
+    """
+
+    __slots__ = ("rows", "columns", "k", "size", "full", "combos", "lines",
+                 "lines_through", "order", "weights", "zobrist")
+
+    def __init__(self, rows: int, columns: int, k: int):
+        if rows < 1 or columns < 1 or not 1 <= k <= max(rows, columns):
+            raise ValueError(f"no line of {k} fits on a {rows}x{columns} board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.size = rows * columns
+        self.full = (1 << self.size) - 1
+        # Every line of k slots: horizontal, vertical and both diagonals
+        combos = []
+        for row in range(rows):
+            for column in range(columns):
+                for dr, dc in (0, 1), (1, 0), (1, 1), (1, -1):
+                    end_row, end_column = row + dr * (k - 1), column + dc * (k - 1)
+                    if 0 <= end_row < rows and 0 <= end_column < columns:
+                        combos.append(tuple((row + dr * i) * columns + column + dc * i for i in range(k)))
+        self.combos = tuple(combos)
+        self.lines = tuple(sum(1 << slot for slot in combo) for combo in combos)
+        # The indices of the lines through each slot
+        self.lines_through = tuple(
+            tuple(i for i, combo in enumerate(combos) if slot in combo) for slot in range(self.size)
+        )
+        # The slots from the centre outwards, a good move order for searching
+        centre_row, centre_column = (rows - 1) / 2, (columns - 1) / 2
+        self.order = tuple(sorted(
+            range(self.size),
+            key=lambda slot: (abs(slot // columns - centre_row) + abs(slot % columns - centre_column), slot)
+        ))
+        # The weight of each slot in the base-3 code of a board
+        self.weights = tuple(3 ** slot for slot in range(self.size))
+        # Zobrist keys: a random 64-bit number per slot and symbol
+        rng = Random(rows * 10007 + columns * 101 + k)
+        self.zobrist = tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(self.size))
+
+@lru_cache(maxsize=None)
+def geometry(rows: int, columns: int, k: int) -> Geometry:
+    "Return the (shared) geometry of a rows-by-columns board won with k in a row."
+    return Geometry(rows, columns, k)
+
+class MNKBoard(MoveStack):
+    """
+    A rows-by-columns tic-tac-toe board won with k symbols in a row.
+
+    Like BitBoard, it holds one mask per symbol, keeps the base-3 code of the
+    position and is played with push() and pop(). It also keeps a 64-bit Zobrist
+    hash of the position, and it looks for a win only on the lines through
+    each move made, remembering the result.
+    """
+
+    __slots__ = "geometry", "x", "o", "code", "hash", "pieces", "_moves", "_wins"
+
+    def __new__(cls, rows: int = 3, columns: int = 3, k: int = 3):
+        self = object.__new__(cls)
+        self.geometry = geometry(rows, columns, k)
+        self.x = 0
+        self.o = 0
+        self.code = 0
+        self.hash = 0
+        self.pieces = 0
+        self._moves = []
+        # The index of the winning line after each move (-1 for none),
+        # starting with that of the initial position
+        self._wins = [-1]
+        return self
+
+    def __init__(self, rows: int = 3, columns: int = 3, k: int = 3):
+        pass
+
+    def __copy__(self):
+        other = object.__new__(type(self))
+        other.geometry = self.geometry
+        other.x = self.x
+        other.o = self.o
+        other.code = self.code
+        other.hash = self.hash
+        other.pieces = self.pieces
+        other._moves = self._moves.copy()
+        other._wins = self._wins.copy()
+        return other
+
+    @classmethod
+    def from_string(cls, strobj: str, rows: int = 3, columns: int = 3, k: int = 3):
+        self = cls(rows, columns, k)
+        geometry = self.geometry
+        index = 0
+        for char in strobj:
+            if char in "XO-":
+                if index >= geometry.size:
+                    raise ValueError("String represents nonexistant board")
+                symbol = _board_symbol(char)
+                if symbol is Symbol.X:
+                    self.x |= 1 << index
+                    self.code += geometry.weights[index]
+                    self.hash ^= geometry.zobrist[index][0]
+                elif symbol is Symbol.O:
+                    self.o |= 1 << index
+                    self.code += 2 * geometry.weights[index]
+                    self.hash ^= geometry.zobrist[index][1]
+                index += 1
+        x, o = popcount(self.x), popcount(self.o)
+        if not 0 <= x - o <= 1:
+            raise ValueError("Invalid board!")
+        self.pieces = x + o
+        # Look for a win on every line, once
+        for i, line in enumerate(geometry.lines):
+            if self.x & line == line or self.o & line == line:
+                self._wins[0] = i
+                break
+        return self
+
+    def __len__(self) -> int:
+        return self.geometry.size
+
+    def __getitem__(self, index: int) -> Optional[Symbol]:
+        size = self.geometry.size
+        if not -size <= index < size:
+            raise IndexError("board index out of range")
+        bit = 1 << (index % size)
+        if self.x & bit:
+            return Symbol.X
+        if self.o & bit:
+            return Symbol.O
+        return None
+
+    ## Making and unmaking moves
+    def is_won(self) -> bool:
+        "Return if the side which moved last has won."
+        return self._wins[-1] >= 0
+
+    def push(self, slot: int) -> None:
+        "Play the symbol of the side to move on the empty slot."
+        geometry = self.geometry
+        # The range first: a negative slot can't be shifted by
+        if not 0 <= slot < geometry.size or (self.x | self.o) >> slot & 1:
+            raise ValueError(f"slot {slot} is not available")
+        bit = 1 << slot
+        # X moves when the piece count is even
+        if self.pieces & 1:
+            self.o |= bit
+            self.code += 2 * geometry.weights[slot]
+            self.hash ^= geometry.zobrist[slot][1]
+            mask = self.o
+        else:
+            self.x |= bit
+            self.code += geometry.weights[slot]
+            self.hash ^= geometry.zobrist[slot][0]
+            mask = self.x
+        self.pieces += 1
+        self._moves.append(slot)
+        # Only the lines through the slot can have been completed
+        won = self._wins[-1]
+        if won < 0:
+            lines = geometry.lines
+            for i in geometry.lines_through[slot]:
+                if mask & lines[i] == lines[i]:
+                    won = i
+                    break
+        self._wins.append(won)
+
+    def pop(self) -> int:
+        "Unmake the last move played with push() and return its slot."
+        geometry = self.geometry
+        slot = self._moves.pop()
+        self._wins.pop()
+        bit = 1 << slot
+        self.pieces -= 1
+        if self.x & bit:
+            self.x &= ~bit
+            self.code -= geometry.weights[slot]
+            self.hash ^= geometry.zobrist[slot][0]
+        else:
+            self.o &= ~bit
+            self.code -= 2 * geometry.weights[slot]
+            self.hash ^= geometry.zobrist[slot][1]
+        return slot
+
+    ## Board interface
+    def win(self) -> tuple[Optional[Symbol], Optional[tuple[int, ...]]]:
+        """
+        Return the symbol which won and the win combination, if that information is available.
+        Otherwise, return (None, None)
+        """
+        won = self._wins[-1]
+        if won < 0:
+            return (None, None)
+        line = self.geometry.lines[won]
+        symbol = Symbol.X if self.x & line == line else Symbol.O
+        return (symbol, self.geometry.combos[won])
+
+    def is_draw(self) -> bool:
+        "Return if there is a draw."
+        return self._wins[-1] < 0 and self.is_full()
+
+    def is_full(self) -> bool:
+        "Return if the board has no room left for a move."
+        return self.pieces == self.geometry.size
+
+    def available_slots(self) -> list[int]:
+        "Return the slots available"
+        taken = self.x | self.o
+        return [slot for slot in range(self.geometry.size) if not taken >> slot & 1]
+
+    def to_move(self) -> Symbol:
+        "Return the symbol whose turn it is"
+        return Symbol.O if self.pieces & 1 else Symbol.X
+
+    def __str__(self):
+        elems = [_elem_str(obj) for obj in self]
+        columns = self.geometry.columns
+        s = ""
+        for i in range(0, len(elems), columns):
+            s = s + " ".join(elems[i:i+columns]) + "\n"
+        return s
+
+    def layout(self) -> str:
+        "Return the grid of slot numbers, for the user to choose from."
+        width = len(str(self.geometry.size - 1))
+        columns = self.geometry.columns
+        s = ""
+        for i in range(0, self.geometry.size, columns):
+            s = s + " ".join(str(slot).rjust(width) for slot in range(i, min(i + columns, self.geometry.size))) + "\n"
+        return s
@@ -0,0 +1,197 @@
+"""
+Headless self-play: many 3x3 games between two players, measuring their strength and speed.
+
+Each player is named: "random" plays any empty slot, "inferior" the tactical
+algorithm, "superior" the database, and a Level name (Easy, Medium, Hard or
+Impossible) the mix of both the visual game plays at that level.
+Every game has its own seeded RNG, so a run is reproducible whatever the number of jobs.
+"""
+# File: tictactoe\core\selfplay.py
+
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from random import Random
+from time import perf_counter, perf_counter_ns
+from typing import Optional
+
+from tictactoe.core.algorithms import inferior_slots, level_slots, superior_slots
+from tictactoe.core.bitboard import BitBoard, first_win, full_mask
+from tictactoe.core.board import wins
+from tictactoe.core.database import attach_database, get_database, share_database
+from tictactoe.core.enums import *
+from tictactoe.core.stats import percentile
+
+# The names of the players, other than the Level names
+PLAYERS = ("random", "inferior", "superior")
+
+def player_names() -> list[str]:
+    "Return the names of every player."
+    return [*PLAYERS, *(level.name for level in Level)]
+
+def choose_slot(name: str, board: BitBoard, symbol: Symbol, rng: Random) -> int:
+    "Return the slot the named player, playing the symbol, chooses on the board."
+    if name == "random":
+        slots = board.available_slots()
+    elif name == "inferior":
+        slots = inferior_slots(board, symbol)
+    elif name == "superior":
+        slots = superior_slots(board, get_database())
+    else:
+        slots = level_slots(board, symbol, Level[name], get_database(), rng)
+    return rng.choice(slots)
+
+def play_game(x_name: str, o_name: str, rng: Random) -> tuple[Optional[Symbol], list[int], list[int]]:
+    """
+    Play one game between the named players, X moving first.
+    Return the winning symbol (None for a draw) and the nanoseconds
+    taken by each move of X and of O.
+    """
+    board = BitBoard()
+    latencies = ([], [])
+    names = (x_name, o_name)
+    symbols = (Symbol.X, Symbol.O)
+    side = 0
+    while True:
+        start = perf_counter_ns()
+        slot = choose_slot(names[side], board, symbols[side], rng)
+        latencies[side].append(perf_counter_ns() - start)
+        board.push(slot)
+        # Only the side which moved can have won
+        if first_win[board.o if side else board.x] < len(wins):
+            return symbols[side], *latencies
+        if board.x | board.o == full_mask:
+            return None, *latencies
+        side ^= 1
+
+def _game_seed(seed: int, index: int) -> str:
+    # The seed of the game with the index, independent of which process plays it.
+    # Random hashes a string seed whole, so no two (seed, index) pairs share one
+    return f"{seed}:{index}"
+
+def _play_games(first: str, second: str, seed: int, indices: range,
+                alternate: bool) -> tuple[list[Outcome], list[int], list[int]]:
+    # Play the games with the indices, in a worker process or this one.
+    # Return the outcome of each from the first player's point of view,
+    # and the move latencies of each player.
+    outcomes = []
+    first_latencies, second_latencies = [], []
+    for index in indices:
+        rng = Random(_game_seed(seed, index))
+        # With alternate, the first player is O in odd games
+        swapped = alternate and index & 1
+        if swapped:
+            winner, second_times, first_times = play_game(second, first, rng)
+            first_symbol = Symbol.O
+        else:
+            winner, first_times, second_times = play_game(first, second, rng)
+            first_symbol = Symbol.X
+        if winner is None:
+            outcomes.append(Outcome.Draw)
+        elif winner is first_symbol:
+            outcomes.append(Outcome.Win)
+        else:
+            outcomes.append(Outcome.Loss)
+        first_latencies.extend(first_times)
+        second_latencies.extend(second_times)
+    return outcomes, first_latencies, second_latencies
+
+@dataclass
+class SimulationResult(object):
+    """
+    The results of a self-play run, from the first player's point of view.
+    """
+    __slots__ = ('first', 'second', 'wins', 'draws', 'losses', 'elapsed',
+                 'first_latencies', 'second_latencies')
+
+    first: str # The name of the first player
+    second: str # The name of the second player
+    wins: int # The games won by the first player
+    draws: int
+    losses: int # The games lost by the first player
+    elapsed: float # The time taken, in seconds
+    first_latencies: list[int] # The nanoseconds taken by each move of the first player, sorted
+    second_latencies: list[int] # The same for the second player
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed > 0 else 0.0
+
+    def rates(self) -> tuple[float, float, float]:
+        "Return the win, draw and loss rates of the first player."
+        games = self.games or 1
+        return self.wins / games, self.draws / games, self.losses / games
+
+    def report(self) -> str:
+        "Return the results as lines of text."
+        win, draw, loss = self.rates()
+        lines = [
+            f"{self.first} vs {self.second}: {self.games} games in {self.elapsed:.2f}s "
+            f"({self.games_per_second:,.0f} games/s)",
+            f"{self.first}: {win:.1%} won, {draw:.1%} drawn, {loss:.1%} lost",
+        ]
+        for name, latencies in ((self.first, self.first_latencies), (self.second, self.second_latencies)):
+            p50, p90, p99 = (percentile(latencies, fraction) / 1000 for fraction in (0.5, 0.9, 0.99))
+            lines.append(f"{name} move latency: p50 {p50:.1f} us, p90 {p90:.1f} us, p99 {p99:.1f} us")
+        return "\n".join(lines)
+
+def simulate(first: str, second: str, games: int = 1000, seed: int = 0, jobs: int = 1,
+             alternate: bool = True) -> SimulationResult:
+    """
+    Play the number of games between the named players and return the results.
+    With alternate, the players take turns to be X; otherwise the first is always X.
+    The games are shared between the number of jobs, jobs - 1 of them in worker processes.
+    """
+    names = player_names()
+    for name in (first, second):
+        if name not in names:
+            raise ValueError(f"unknown player {name!r}")
+    if games < 0:
+        raise ValueError("the number of games must not be negative")
+    jobs = max(1, min(jobs, games))
+    # Open the database before timing
+    get_database()
+    # Each job plays an interleaved share of the games
+    shares = [range(job, games, jobs) for job in range(jobs)]
+    start = perf_counter()
+    if jobs == 1:
+        results = [_play_games(first, second, seed, shares[0], alternate)]
+    else:
+        # The workers attach to one copy of the database in shared memory
+        with share_database() as shared, ProcessPoolExecutor(
+                jobs - 1, initializer=attach_database, initargs=(shared.name,)) as executor:
+            futures = [executor.submit(_play_games, first, second, seed, share, alternate)
+                       for share in shares[1:]]
+            results = [_play_games(first, second, seed, shares[0], alternate)]
+            results.extend(future.result() for future in futures)
+    elapsed = perf_counter() - start
+    outcomes = [outcome for result in results for outcome in result[0]]
+    return SimulationResult(
+        first, second,
+        outcomes.count(Outcome.Win), outcomes.count(Outcome.Draw), outcomes.count(Outcome.Loss),
+        elapsed,
+        sorted(latency for result in results for latency in result[1]),
+        sorted(latency for result in results for latency in result[2]),
+    )
+
+def main(argv: Optional[list[str]] = None) -> None:
+    "Run a self-play simulation from the command line."
+    names = player_names()
+    parser = ArgumentParser(description="Play many tic-tac-toe games between two computer players.")
+    parser.add_argument("first", choices=names, help="the player whose results are reported")
+    parser.add_argument("second", choices=names, help="the opponent")
+    parser.add_argument("--games", "-n", type=int, default=1000, help="the number of games")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the games' random choices")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="processes playing the games")
+    parser.add_argument("--fixed-sides", action="store_true",
+                        help="the first player is always X, instead of alternating")
+    args = parser.parse_args(argv)
+    result = simulate(args.first, args.second, args.games, args.seed, args.jobs, not args.fixed_sides)
+    print(result.report())
+
+if __name__ == "__main__":
+    main()
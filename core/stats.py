@@ -0,0 +1,9 @@
+"Small statistics helpers shared by the measuring tools."
+# File: tictactoe\core\stats.py
+
+def percentile(values: list[int], fraction: float) -> int:
+    "Return the value at the fraction (0 to 1) of the sorted values, by the nearest rank."
+    if not values:
+        return 0
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
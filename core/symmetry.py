@@ -0,0 +1,65 @@
+"Define the symmetries of the tic-tac-toe board and the canonical form of a position."
+# File: tictactoe\core\symmetry.py
+
+# Helpers
+
+# A symmetry is a permutation of the slots.
+# The transformed board holds board[perm[i]] in slot i, so a move on slot i of
+# the transformed board is a move on slot perm[i] of the original board.
+Permutation = tuple[int, int, int, int, int, int, int, int, int]
+
+def _rotate(perm: Permutation) -> Permutation:
+    # Rotate a quarter turn clockwise
+    return tuple(perm[(2 - i % 3) * 3 + i // 3] for i in range(9))
+
+def _reflect(perm: Permutation) -> Permutation:
+    # Mirror left to right
+    return tuple(perm[i - i % 3 + 2 - i % 3] for i in range(9))
+
+identity = tuple(range(9))
+rotations = (identity, _rotate(identity), _rotate(_rotate(identity)), _rotate(_rotate(_rotate(identity))))
+# The 8 symmetries of the square: 4 rotations and their mirror images
+symmetries = (*rotations, *(_reflect(perm) for perm in rotations))
+
+## Lookup tables, indexed by a 9-bit mask
+# The mask moved by each symmetry
+_mask_tables = tuple(
+    tuple(sum(1 << i for i in range(9) if mask >> perm[i] & 1) for mask in range(512))
+    for perm in symmetries
+)
+# The sum of 3 ** slot over the slots set in the mask
+_ternary = tuple(sum(3 ** i for i in range(9) if mask >> i & 1) for mask in range(512))
+
+def decode(code: int) -> tuple[int, int]:
+    "Return the X and O masks of the board with the provided base-3 code."
+    x = o = 0
+    for index in range(9):
+        code, digit = divmod(code, 3)
+        if digit == 1:
+            x |= 1 << index
+        elif digit == 2:
+            o |= 1 << index
+    return x, o
+
+def images(x: int, o: int, moves: int = 0) -> list[tuple[int, int]]:
+    """
+    Return the code of each of the 8 transforms of the board with the provided
+    X and O masks, along with the mask of moves moved by the same transform.
+    """
+    result = []
+    for table in _mask_tables:
+        result.append((_ternary[table[x]] + 2 * _ternary[table[o]], table[moves]))
+    return result
+
+def canonical_masks(x: int, o: int) -> tuple[int, int, int, Permutation]:
+    """
+    Return the canonical form of the board with the provided X and O masks,
+    as its code, its X mask, its O mask and the symmetry leading to it.
+    """
+    best = None
+    for perm, table in zip(symmetries, _mask_tables):
+        tx, to = table[x], table[o]
+        code = _ternary[tx] + 2 * _ternary[to]
+        if best is None or code < best[0]:
+            best = (code, tx, to, perm)
+    return best
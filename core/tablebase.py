@@ -0,0 +1,138 @@
+"Read and write tablebases: fully solved m,n,k boards packed at 2 bits per position."
+# File: tictactoe\core\tablebase.py
+
+from mmap import mmap, ACCESS_READ
+from struct import Struct
+from threading import Lock
+from typing import Optional
+
+import atexit
+import os
+
+from tictactoe.core.database import DATA_DIR
+from tictactoe.core.enums import *
+from tictactoe.core.mnk import MNKBoard
+
+# The file format (all integers little-endian):
+#   header: magic (4 bytes), version (uint16), rows, columns, k (uint8 each), padding (1 byte)
+#   values: 2 bits per board, indexed by the board's base-3 code, 4 boards per byte
+#           (board code c is in byte c // 4, at bits 2 * (c % 4) and up)
+# A value is the outcome for the side to move:
+UNKNOWN, WIN, DRAW, LOSS = range(4) # UNKNOWN is for boards no game reaches
+MAGIC = b"TTTB"
+VERSION = 1
+_header = Struct("<4sHBBBx")
+HEADER_SIZE = _header.size
+
+# The outcome of each value
+_outcomes = (None, Outcome.Win, Outcome.Draw, Outcome.Loss)
+# The value of the side which moved, by the value of the side to move
+REVERSED = (UNKNOWN, LOSS, DRAW, WIN)
+
+def filename(rows: int, columns: int, k: int) -> str:
+    "Return the name of the tablebase file of the board shape."
+    return f"tablebase{rows}x{columns}k{k}.bin"
+
+def data_size(rows: int, columns: int) -> int:
+    "Return the number of bytes of values of the board shape."
+    return (3 ** (rows * columns) + 3) // 4
+
+def write_header(file, rows: int, columns: int, k: int) -> None:
+    "Write the header of a tablebase to the binary file object provided."
+    file.write(_header.pack(MAGIC, VERSION, rows, columns, k))
+
+class Tablebase(object):
+    """
+    A read-only tablebase, memory-mapped from its file.
+
+    Answers the outcome of any board of its shape with a few arithmetic
+    operations on the board's base-3 code.
+    """
+
+    __slots__ = "rows", "columns", "k", "_file", "_map"
+
+    def __new__(cls, path: str):
+        self = object.__new__(cls)
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+            magic, version, self.rows, self.columns, self.k = _header.unpack_from(self._map)
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a tablebase")
+            if version != VERSION:
+                raise ValueError(f"{path} has unsupported tablebase version {version}")
+            if len(self._map) < HEADER_SIZE + data_size(self.rows, self.columns):
+                raise ValueError(f"{path} is truncated")
+        except BaseException:
+            self._file.close()
+            raise
+        return self
+
+    def __init__(self, path: str):
+        pass
+
+    def value(self, code: int) -> int:
+        "Return the value (UNKNOWN, WIN, DRAW or LOSS) of the board with the provided code."
+        return self._map[HEADER_SIZE + (code >> 2)] >> ((code & 3) << 1) & 3
+
+    def outcome(self, board: MNKBoard) -> Optional[Outcome]:
+        "Return the outcome of the board for the side to move, or None if no game reaches it."
+        return _outcomes[self.value(board.code)]
+
+    def best_slots(self, board: MNKBoard) -> list[int]:
+        "Return the slots of the undecided board reaching the best outcome for the side to move."
+        weights = board.geometry.weights
+        # X (digit 1) moves when the piece count is even
+        digit = 2 if board.pieces & 1 else 1
+        taken = board.x | board.o
+        best, slots = None, []
+        for slot in range(board.geometry.size):
+            if taken >> slot & 1:
+                continue
+            value = REVERSED[self.value(board.code + digit * weights[slot])]
+            # WIN < DRAW < LOSS
+            if best is None or value < best:
+                best, slots = value, [slot]
+            elif value == best:
+                slots.append(slot)
+        return slots
+
+    def close(self) -> None:
+        "Release the memory map and its file."
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+## The process-wide registry of open tablebases
+_tablebases: dict[tuple[int, int, int], Optional[Tablebase]] = {}
+_lock = Lock()
+
+def get_tablebase(rows: int, columns: int, k: int) -> Optional[Tablebase]:
+    """
+    Return the tablebase of the board shape, or None if it hasn't been built
+    (see tictactoe.core.tablebase_builder).
+
+    Each tablebase is opened on first use, then shared by every later game
+    in the process. Safe to call from any thread.
+    """
+    shape = (rows, columns, k)
+    if shape not in _tablebases:
+        with _lock:
+            if shape not in _tablebases:
+                path = os.path.join(DATA_DIR, filename(rows, columns, k))
+                _tablebases[shape] = Tablebase(path) if os.path.exists(path) else None
+    return _tablebases[shape]
+
+@atexit.register
+def close_tablebases() -> None:
+    "Close every tablebase opened by get_tablebase()."
+    with _lock:
+        for tablebase in _tablebases.values():
+            if tablebase is not None:
+                tablebase.close()
+        _tablebases.clear()
@@ -0,0 +1,207 @@
+"Define the UltimateBoard class: a 3x3 grid of tic-tac-toe boards, each move deciding where the next is played."
+# File: tictactoe\core\ultimate.py
+
+from typing import Optional
+
+from tictactoe.core.bitboard import BitBoard, MoveStack, full_mask, mask_slots, first_win
+from tictactoe.core.board import Combination, wins, _elem_str
+from tictactoe.core.enums import *
+
+# The number of slots: 9 sub-boards of 9 slots.
+# Slot s is slot s % 9 of sub-board s // 9.
+SIZE = 81
+
+class UltimateBoard(MoveStack):
+    """
+    The board of Ultimate tic-tac-toe.
+
+    A move on slot i of a sub-board sends the opponent to sub-board i,
+    or anywhere if that sub-board is closed. A sub-board is closed once won,
+    by the same win combinations as Board, or full. The game is won with three
+    won sub-boards in a row, and drawn if every sub-board closes first.
+
+    Each sub-board is held as two 9-bit masks, like BitBoard, and only the
+    sub-board of each move is looked at for a win. The closed sub-boards, the
+    sub-board to play next and the winner are kept up to date on push() and pop().
+    """
+
+    __slots__ = ("x", "o", "x_boards", "o_boards", "closed", "forced", "pieces",
+                 "_moves", "_forced", "_wins")
+
+    def __new__(cls):
+        self = object.__new__(cls)
+        # The X and O masks of each sub-board
+        self.x = [0] * 9
+        self.o = [0] * 9
+        # The masks of the sub-boards won by X, won by O and closed
+        self.x_boards = 0
+        self.o_boards = 0
+        self.closed = 0
+        self.forced: Optional[int] = None # The sub-board to play next, None for any
+        self.pieces = 0
+        self._moves = []
+        # The forced sub-board before each move
+        self._forced = []
+        # The index (into wins) of the won sub-boards in a row after each move
+        # (-1 for none), starting with that of the initial position
+        self._wins = [-1]
+        return self
+
+    def __init__(self):
+        pass
+
+    def __copy__(self):
+        other = object.__new__(type(self))
+        other.x = self.x.copy()
+        other.o = self.o.copy()
+        other.x_boards = self.x_boards
+        other.o_boards = self.o_boards
+        other.closed = self.closed
+        other.forced = self.forced
+        other.pieces = self.pieces
+        other._moves = self._moves.copy()
+        other._forced = self._forced.copy()
+        other._wins = self._wins.copy()
+        return other
+
+    def __len__(self) -> int:
+        return SIZE
+
+    def __getitem__(self, index: int) -> Optional[Symbol]:
+        if not -SIZE <= index < SIZE:
+            raise IndexError("board index out of range")
+        board, slot = divmod(index % SIZE, 9)
+        bit = 1 << slot
+        if self.x[board] & bit:
+            return Symbol.X
+        if self.o[board] & bit:
+            return Symbol.O
+        return None
+
+    def sub_board(self, index: int) -> BitBoard:
+        "Return a copy of the sub-board with the provided index (0 to 8)."
+        return BitBoard(self[index * 9 + slot] for slot in range(9))
+
+    ## Making and unmaking moves
+    def is_won(self) -> bool:
+        "Return if the side which moved last has won."
+        return self._wins[-1] >= 0
+
+    def push(self, slot: int) -> None:
+        "Play the symbol of the side to move on the slot, which must be available."
+        if not 0 <= slot < SIZE:
+            raise ValueError(f"slot {slot} is not available")
+        board, cell = divmod(slot, 9)
+        bit = 1 << cell
+        if (self._wins[-1] >= 0 or self.closed >> board & 1
+                or (self.forced is not None and self.forced != board)
+                or (self.x[board] | self.o[board]) & bit):
+            raise ValueError(f"slot {slot} is not available")
+        board_bit = 1 << board
+        # X moves when the piece count is even
+        if self.pieces & 1:
+            self.o[board] |= bit
+            mask = self.o[board]
+        else:
+            self.x[board] |= bit
+            mask = self.x[board]
+        self.pieces += 1
+        self._moves.append(slot)
+        self._forced.append(self.forced)
+        # Only the sub-board of the move can have closed, and only the mover can have won it
+        won = -1
+        if first_win[mask] < len(wins):
+            self.closed |= board_bit
+            if self.pieces & 1:
+                self.x_boards |= board_bit
+                won = first_win[self.x_boards]
+            else:
+                self.o_boards |= board_bit
+                won = first_win[self.o_boards]
+            if won == len(wins):
+                won = -1
+        elif self.x[board] | self.o[board] == full_mask:
+            self.closed |= board_bit
+        self._wins.append(won)
+        # The opponent plays in the sub-board of the cell, unless it is closed
+        self.forced = None if self.closed >> cell & 1 else cell
+
+    def pop(self) -> int:
+        "Unmake the last move played with push() and return its slot."
+        slot = self._moves.pop()
+        board, cell = divmod(slot, 9)
+        bit = 1 << cell
+        if self.x[board] & bit:
+            self.x[board] &= ~bit
+        else:
+            self.o[board] &= ~bit
+        self.pieces -= 1
+        # The sub-board was open before the move
+        board_bit = ~(1 << board)
+        self.closed &= board_bit
+        self.x_boards &= board_bit
+        self.o_boards &= board_bit
+        self.forced = self._forced.pop()
+        self._wins.pop()
+        return slot
+
+    ## Board interface
+    def win(self) -> tuple[Optional[Symbol], Optional[Combination]]:
+        """
+        Return the symbol which won and the combination of sub-boards won,
+        if that information is available. Otherwise, return (None, None)
+        """
+        won = self._wins[-1]
+        if won < 0:
+            return (None, None)
+        # The side which moved last won: X if the piece count is odd
+        symbol = Symbol.X if self.pieces & 1 else Symbol.O
+        return (symbol, wins[won])
+
+    def is_draw(self) -> bool:
+        "Return if there is a draw."
+        return self._wins[-1] < 0 and self.is_full()
+
+    def is_full(self) -> bool:
+        "Return if the board has no room left for a move."
+        return self.closed == full_mask
+
+    def available_slots(self) -> list[int]:
+        "Return the slots available to the side to move"
+        if self._wins[-1] >= 0:
+            return []
+        if self.forced is not None:
+            boards = (self.forced,)
+        else:
+            boards = mask_slots[full_mask & ~self.closed]
+        slots = []
+        for board in boards:
+            base = board * 9
+            slots.extend(base + cell for cell in mask_slots[full_mask & ~(self.x[board] | self.o[board])])
+        return slots
+
+    def to_move(self) -> Symbol:
+        "Return the symbol whose turn it is"
+        return Symbol.O if self.pieces & 1 else Symbol.X
+
+    def _grid(self, elems: list[str]) -> str:
+        # Lay the 81 elements out as 9 rows, the sub-boards separated by lines
+        width = max(len(elem) for elem in elems)
+        rows = []
+        for row in range(9):
+            parts = []
+            for column in range(0, 9, 3):
+                board = row // 3 * 3 + column // 3
+                start = board * 9 + row % 3 * 3
+                parts.append(" ".join(elem.rjust(width) for elem in elems[start:start+3]))
+            rows.append(" | ".join(parts))
+            if row in (2, 5):
+                rows.append("-+-".join("-" * len(part) for part in parts))
+        return "\n".join(rows) + "\n"
+
+    def __str__(self):
+        return self._grid([_elem_str(obj) for obj in self])
+
+    def layout(self) -> str:
+        "Return the grid of slot numbers, for the user to choose from."
+        return self._grid([str(slot) for slot in range(SIZE)])
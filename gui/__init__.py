@@ -9,11 +9,12 @@ from tictactoe.gui.box import Box, BoxGroup
 from tictactoe.gui.button import Button, ButtonText
 
 from tictactoe.core.enums import *
-from tictactoe.core.board import Board, Combination, wins
+from tictactoe.core.algorithms import level_slots
+from tictactoe.core.bitboard import BitBoard
+from tictactoe.core.board import Combination
 from tictactoe.core.cpu_database_builder import build
+from tictactoe.core.database import get_database
 
-from copy import copy
-from pickle import load
 from typing import Optional
 
 import tictactoe.gui.colors as colors
@@ -32,7 +33,7 @@ def load_resources() -> None:
     global paper, font, small_font
     global pregame_music, game_music, win_music, draw_music, lose_music
     global quit, clock, board, bg, level
-    global quit_button, replay_button
+    global quit_button, replay_button, undo_button
     global easy_button, medium_button, hard_button, impossible_button
 
     if __name__ != "__main__":
@@ -55,7 +56,7 @@ def load_resources() -> None:
     # Used to manage how fast the screen updates
     clock = pygame.time.Clock() # this controls how fast the game runs
 
-    board = Board()
+    board = BitBoard()
     bg = BoxGroup(175, 175)
 
     level = Level.Impossible
@@ -65,6 +66,8 @@ def load_resources() -> None:
                            500, 25, 150, 50, colors.Aquamarine)
     quit_button = Button(screen, ButtonText(small_font, "Quit", 50, 15, colors.Azurite, None),
                          500, 100, 150, 50, colors.HotPink)
+    undo_button = Button(screen, ButtonText(small_font, "Undo", 50, 15, colors.Purple, None),
+                         500, 25, 150, 50, colors.Aquamarine)
 
     easy_button = Button(screen, ButtonText(small_font, "Easy", 50, 15, colors.Coral, None),
                          200, 100, 150, 50, colors.Green)
@@ -177,17 +180,12 @@ def init() -> None:
 def prepare(user_symbol: Symbol):
     """
     Assign the provided symbol to the user, the other to the computer.
-    Load the appropriate database for the computer's use.
+    Get the database for the computer's use.
+    The database is loaded once per process and shared by later games.
     """
-    build_cpu_database()
-    
-    Player.User.assign(user_symbol)
-    if Player.Computer.symbol == Symbol.X:
-        file = open("cpudata1.txt", "rb")
-    else:
-        file = open("cpudata2.txt", "rb")
-    global database
-    database = load(file)
+    global assignment, database
+    assignment = Assignment(user_symbol)
+    database = get_database()
 
 def get_user_input() -> int:
     """Return the index requested by the user.
@@ -205,6 +203,10 @@ def get_user_input() -> int:
                 game_music.stop()
                 return
             elif event.type == pygame.MOUSEBUTTONDOWN:
+                # Take back the user's last move if the undo button is pressed
+                if undo_button.hovering():
+                    take_back()
+                    continue
                 slot = bg.hovered_slot()
                 if isinstance(slot, int):
                     return slot
@@ -214,6 +216,7 @@ def get_user_input() -> int:
         # --- Drawing code should go here
         bg.draw(screen)
         write_text(screen, font, "Tic-Tac-Toe!!!", 150, 20, colors.Orange)
+        undo_button.draw()
         # --- Go ahead and update the screen with what we've drawn.
         pygame.display.flip()
         # --- Limit to 30 frames per second
@@ -234,11 +237,23 @@ def write_user_input(index: int) -> bool:
         if isinstance(index, int) and 0 <= index < 9:
             symbol = board[index]
             if symbol is None:
-                board[index] = Player.User.symbol
+                board.push(index)
                 bg.update(board)
                 return True
         return False
     
+def take_back() -> bool:
+    """
+    Take back the user's last move, and the computer's reply to it.
+    
+    This function will return True if there was a move to take back,
+    False otherwise.
+    """
+    if board.take_back(assignment.user):
+        bg.update(board)
+        return True
+    return False
+    
 def user_turn():
     """
     Define one user turn. 
@@ -287,81 +302,15 @@ def computer_turn():
             return
         
     # --- Game logic should go here
-    best_slots = []
-    
-    if random.randrange(3) + 1 > level.value:
-        # The Inferior Algorithm
-        # In general, this algorithm gathers a list of slots to randomly choose from
-        # If the computer can win, only winning slots are available 
-        # If the user can win next turn, only slots preventing the player's win are available
-        # Otherwise, all empty slots are available
-        
-        winnable = False  # Boolean variable used to indicated sureness of a win.
-        # Iterate over every win combination
-        for combo in wins:
-            # The empty slot number
-            empty_slot = None
-            # The accepted symbol. (None if not winnable, otherwise computer's symbol)
-            symbol = None if not winnable else Player.Computer.symbol
-            valid = True # Boolean variable used to allow appending of empty slot to list of slots
-                         # to choose from (best_slots)
-            # Iterate over the combo's slots
-            for slot in combo:
-                value = board[slot] # Get the symbol of the slot
-                if value is None: # If there's no symbol...
-                    # If there is no empty slot, assign the slot number as the empty slot
-                    # Otherwise, exit this for loop and declare this combo invalid.
-                    if empty_slot is not None:
-                        valid = False
-                        break
-                    empty_slot = slot
-                else: # If there is a symbol
-                    # If only one symbol is accepted, break and invalidate the 
-                    # combo if the value isn't the symbol. 
-                    if symbol is not None: 
-                        if value is not symbol:
-                            valid = False
-                            break
-                    # Otherwise, set the accepted symbol to the value
-                    symbol = value
-            if valid:
-                # If the computer realizes it can surely win, clear the old
-                # best_slots and set winnable to True
-                if not winnable and symbol is Player.Computer.symbol:
-                    best_slots.clear()
-                    winnable = True
-                # Add the empty slot to best_slots
-                best_slots.append(empty_slot)
-        
-                
-        if not best_slots:
-            # If there are no available slots, all empty slots are available
-            best_slots = [i for i in range(9) if board[i] is None]
-                        
-                        
-    else:
-        # The Superior Algorithm
-        # Check the database and only slots allowing the best possible outcome
-        # are available for the computer's choosing
-        best_outcome = Outcome.Loss
-        slots = board.available_slots()
-    
-        for slot in slots:
-            board_copy = copy(board)
-            board_copy[slot] = Player.Computer.symbol
-            outcome = database[repr(board_copy)]
-            # Note: Win < Draw < Loss. See tictactoe\core\enums.Outcomes
-            if outcome.value < best_outcome.value:
-                best_outcome = outcome
-                best_slots = [slot]
-            elif outcome.value == best_outcome.value:
-                best_slots.append(slot)
+    # Gather the slots to choose from: those of the inferior (tactical) algorithm
+    # or those of the superior (database) algorithm, depending on the level
+    best_slots = level_slots(board, assignment.computer, level, database)
     
     # Choose a random slot from the available slots
     slot = random.choice(best_slots)
 
     # Write to the slot
-    board[slot] = Player.Computer.symbol   
+    board.push(slot)
     bg.update(board)
     # --- Screen-clearing code goes here
     screen.blit(paper, [0, 0])
@@ -439,14 +388,14 @@ def play():
         # Play the game music
         game_music.play()
         # If the computer's symbol is X, it goes first
-        if Player.User.symbol == Symbol.O:
+        if assignment.user is Symbol.O:
             computer_turn()
-        while board.rank() is Outcome.Undetermined and not quit:
+        while board.rank(assignment) is Outcome.Undetermined and not quit:
             # The user and computer alternate turns until the game is over
             if quit:
                 break            
             user_turn()
-            if quit or board.rank() is not Outcome.Undetermined:
+            if quit or board.rank(assignment) is not Outcome.Undetermined:
                 break
             computer_turn()
             if quit:
@@ -454,7 +403,7 @@ def play():
         # Stop the game music
         game_music.stop()
         # Select the appropriate postgame music based off the outcome
-        winner, combo = board.winner()
+        winner, combo = board.winner(assignment)
         global postgame_music
         if winner is Player.User:
             postgame_music = win_music
@@ -474,7 +423,7 @@ def run():
         play()
         # Reset the board and box group
         global board
-        board = Board()
+        board = BitBoard()
         bg.update(board)
     # Stop all music (music doesn't terminate with pygame)
     for music in pregame_music, game_music, win_music, draw_music, lose_music:
@@ -12,6 +12,7 @@ import tictactoe.gui.colors as colors
 from tictactoe.gui.colors import ColorType
 from tictactoe.core.enums import Symbol
 from tictactoe.core.board import Board, Combination
+from tictactoe.core.ultimate import UltimateBoard
 import tictactoe.core.board as board
 
 class Box(object):
@@ -90,6 +91,18 @@ class Box(object):
             pygame.draw.circle(screen, color, [self.x + half_length, self.y + half_length], half_length - self.buffer, 
                                self.symbol_size)
             
+
+class SmallBox(Box):
+    """
+    A smaller box, for the sub-boards of Ultimate tic-tac-toe.
+    """
+    __slots__ = ()
+    
+    length = 40
+    partition = 4
+    symbol_size = 4
+    buffer = 4
+    
             
 class BoxGroup(object):
     """
@@ -101,6 +114,8 @@ class BoxGroup(object):
     
     __slots__ = "x", "y", "boxes"
     
+    box_type = Box # The type of the boxes
+    
     def __init__(self, x: int, y: int, board: Optional[Board] = None):
         self.x = x
         self.y = y
@@ -109,9 +124,10 @@ class BoxGroup(object):
         if board is None:
             board = Board()
             
+        length = self.box_type.length
         for i in range(3):
             for j in range(3):
-                self.boxes.append(Box(x + (Box.length * j), y + (Box.length * i), len(self.boxes), board[len(self.boxes)]))
+                self.boxes.append(self.box_type(x + (length * j), y + (length * i), len(self.boxes), board[len(self.boxes)]))
                                   
     
     def draw(self, screen: pygame.Surface, color: ColorType = colors.Grey) -> None:
@@ -127,7 +143,7 @@ class BoxGroup(object):
         """
         start = self.boxes[combo[0]]
         end = self.boxes[combo[2]]
-        pygame.draw.line(screen, color, start.centre(), end.centre(), 10)
+        pygame.draw.line(screen, color, start.centre(), end.centre(), self.box_type.symbol_size)
             
     def update(self, board: Board):
         """
@@ -142,4 +158,80 @@ class BoxGroup(object):
         for box in self.boxes:
             if box.hovered():
                 return box.index
-        return None
\ No newline at end of file
+        return None
+
+
+class SubBoxGroup(BoxGroup):
+    """
+    A BoxGroup of small boxes: one sub-board of Ultimate tic-tac-toe.
+    """
+    __slots__ = ()
+    
+    box_type = SmallBox
+    
+    
+class UltimateBoxGroup(object):
+    """
+    A group of 9 SubBoxGroup instances arranged 3x3, fit for a game of 
+    Ultimate tic-tac-toe.
+    
+    This is the GUI for the UltimateBoard class. Slot s is box s % 9
+    of group s // 9, like the board.
+    """
+    
+    __slots__ = "x", "y", "groups"
+    
+    gap = 20 # Length of the space between the groups
+    
+    def __init__(self, x: int, y: int, board: Optional[UltimateBoard] = None):
+        self.x = x
+        self.y = y
+        self.groups = []
+        
+        if board is None:
+            board = UltimateBoard()
+            
+        step = SmallBox.length * 3 + self.gap
+        for i in range(3):
+            for j in range(3):
+                self.groups.append(SubBoxGroup(x + (step * j), y + (step * i), board.sub_board(len(self.groups))))
+                
+    def draw(self, screen: pygame.Surface, color: ColorType = colors.Grey, 
+             board: Optional[UltimateBoard] = None, active_color: ColorType = colors.Black) -> None:
+        """
+        Output the groups to the screen provided. 
+        If a board is provided, the groups it may be played in next are drawn in the active color, 
+        and the win combination of each won group is displayed.
+        """
+        for index, group in enumerate(self.groups):
+            open_group = board is not None and any(slot // 9 == index for slot in board.available_slots())
+            group.draw(screen, active_color if open_group else color)
+            if board is not None:
+                winner, combo = board.sub_board(index).win()
+                if winner is not None:
+                    group.display_win(screen, color, combo)
+            
+    def display_win(self, screen: pygame.Surface, color: Optional[ColorType], combo: Combination) -> None:
+        """
+        Display the winning combination of groups.
+        """
+        # The centre box of a group is its centre
+        start = self.groups[combo[0]].boxes[4]
+        end = self.groups[combo[2]].boxes[4]
+        pygame.draw.line(screen, color, start.centre(), end.centre(), 10)
+        
+    def update(self, board: UltimateBoard):
+        """
+        Update the groups using an UltimateBoard instance.
+        """
+        self.__init__(self.x, self.y, board)
+        
+    def hovered_slot(self) -> Optional[int]:
+        """
+        Return the slot hovered, or None if no slot.
+        """
+        for index, group in enumerate(self.groups):
+            slot = group.hovered_slot()
+            if slot is not None:
+                return index * 9 + slot
+        return None
@@ -0,0 +1,230 @@
+"""
+A long-lived engine process answering a line-based text protocol on stdin and stdout, like UCI.
+
+The database (and, on bigger boards, the tablebase or search engine) is loaded once,
+at startup, so each query costs only its lookup or search. Commands, one per line:
+
+    uci                                 list the engine's name and options, then "uciok"
+    isready                             "readyok", once every earlier command is done
+    setoption name level value Hard     Easy, Medium, Hard or Impossible (default)
+    setoption name board value 4x4      3x3 (default) or another m,n,k variant
+    setoption name budget value 0.5     seconds of search per move on boards bigger than 3x3
+    ucinewgame                          start a new game: the empty board, fresh search tables
+    position startpos [moves 4 0 ...]   the empty board, then the moves
+    position XO--X---- [moves 8 ...]    the board in repr() form, then the moves
+    go                                  "bestmove <slot>", or "bestmove none" if the game is over
+    analyze                             "info ..." with the outcome or score of the side to move
+                                        and its best moves
+    quit                                exit
+
+Slots are numbered row by row from 0. Errors give "info string error: ...".
+"""
+# File: tictactoe\protocol.py
+
+from argparse import ArgumentParser
+from random import Random
+from typing import Optional, TextIO
+
+import sys
+
+from tictactoe.core.algorithms import level_slots
+from tictactoe.core.bitboard import BitBoard, mask_slots
+from tictactoe.core.database import get_database
+from tictactoe.core.engine import AlphaBetaEngine
+from tictactoe.core.enums import *
+from tictactoe.core.mnk import VARIANTS, MNKBoard
+from tictactoe.core.tablebase import get_tablebase
+
+NAME = "tictactoe"
+
+class EngineProtocol(object):
+    """
+    The state of one engine process: the options, the current position and the engines.
+    """
+    __slots__ = "output", "level", "variant", "budget", "board", "rng", "database", "engine", "tablebase"
+
+    def __new__(cls, output: TextIO = sys.stdout, seed: Optional[int] = None):
+        self = object.__new__(cls)
+        self.output = output
+        self.level = Level.Impossible
+        self.variant = "3x3"
+        self.budget = 1.0
+        self.rng = Random(seed)
+        # Loaded now, so no query pays for it
+        self.database = get_database()
+        self.engine: Optional[AlphaBetaEngine] = None
+        self.tablebase = None
+        self.board = self.new_board()
+        return self
+
+    def __init__(self, output: TextIO = sys.stdout, seed: Optional[int] = None):
+        pass
+
+    def send(self, line: str) -> None:
+        "Write a line of output, flushed at once for the client waiting on it."
+        self.output.write(line + "\n")
+        self.output.flush()
+
+    ## The board
+    def new_board(self):
+        "Return the empty board of the variant."
+        if self.variant == "3x3":
+            return BitBoard()
+        return MNKBoard(*VARIANTS[self.variant])
+
+    def parse_board(self, text: str):
+        "Return the board of the variant written in repr() form."
+        size = len(self.new_board())
+        if len(text) != size or text.strip("XO-"):
+            raise ValueError(f"the board must be {size} characters of 'XO-'")
+        if self.variant == "3x3":
+            board = BitBoard.from_string(text)
+            board.to_move() # Raises ValueError if invalid
+            return board
+        return MNKBoard.from_string(text, *VARIANTS[self.variant])
+
+    def is_over(self, board=None) -> bool:
+        "Return if the game is over on the board (by default, the current position's)."
+        board = self.board if board is None else board
+        symbol, _ = board.win()
+        return symbol is not None or not board.available_slots()
+
+    ## Commands
+    def uci(self, args: list[str]) -> None:
+        self.send(f"id name {NAME}")
+        levels = " ".join(f"var {level.name}" for level in Level)
+        variants = " ".join(f"var {variant}" for variant in VARIANTS)
+        self.send(f"option name level type combo default {Level.Impossible.name} {levels}")
+        self.send(f"option name board type combo default 3x3 {variants}")
+        self.send("option name budget type string default 1.0")
+        self.send("uciok")
+
+    def isready(self, args: list[str]) -> None:
+        self.send("readyok")
+
+    def setoption(self, args: list[str]) -> None:
+        # setoption name <name> value <value>
+        if len(args) != 4 or args[0] != "name" or args[2] != "value":
+            raise ValueError("expected setoption name <name> value <value>")
+        name, value = args[1].lower(), args[3]
+        if name == "level":
+            try:
+                self.level = Level[value.capitalize()]
+            except KeyError:
+                raise ValueError(f"unknown level {value!r}") from None
+        elif name == "board":
+            if value not in VARIANTS:
+                raise ValueError(f"unknown board {value!r}")
+            self.variant = value
+            if value == "3x3":
+                self.engine = self.tablebase = None
+            else:
+                self.engine = AlphaBetaEngine(self.budget)
+                self.tablebase = get_tablebase(*VARIANTS[value])
+            self.board = self.new_board()
+        elif name == "budget":
+            budget = float(value)
+            if budget <= 0:
+                raise ValueError("the budget must be positive")
+            self.budget = budget
+            if self.engine is not None:
+                self.engine.budget = budget
+        else:
+            raise ValueError(f"unknown option {args[1]!r}")
+
+    def ucinewgame(self, args: list[str]) -> None:
+        self.board = self.new_board()
+        if self.engine is not None:
+            self.engine = AlphaBetaEngine(self.budget)
+
+    def position(self, args: list[str]) -> None:
+        # position (startpos | <board>) [moves <slot> ...]
+        if not args:
+            raise ValueError("expected position startpos or position <board>")
+        board = self.new_board() if args[0] == "startpos" else self.parse_board(args[0])
+        moves = args[1:]
+        if moves:
+            if moves[0] != "moves":
+                raise ValueError(f"unexpected {moves[0]!r}")
+            for move in moves[1:]:
+                if self.is_over(board):
+                    raise ValueError(f"move {move} is after the end of the game")
+                board.push(int(move))
+        self.board = board
+
+    def choose_move(self) -> int:
+        "Return the move to play in the current position, at the level."
+        board = self.board
+        if self.variant == "3x3":
+            return self.rng.choice(level_slots(board, board.to_move(), self.level, self.database, self.rng))
+        # Like the command-line game on bigger boards
+        if self.rng.randrange(3) + 1 > self.level.value:
+            return self.rng.choice(board.available_slots())
+        if self.tablebase is not None:
+            return self.rng.choice(self.tablebase.best_slots(board))
+        return self.engine.choose_move(board)
+
+    def go(self, args: list[str]) -> None:
+        if self.is_over():
+            self.send("bestmove none")
+        else:
+            self.send(f"bestmove {self.choose_move()}")
+
+    def analyze(self, args: list[str]) -> None:
+        board = self.board
+        if self.variant == "3x3":
+            outcome, moves = self.database[board.code]
+            depth = self.database.depth(board.code)
+            slots = " ".join(map(str, mask_slots[moves]))
+            self.send(f"info outcome {outcome.name} depth {depth} bestmoves {slots}".rstrip())
+        elif self.is_over():
+            symbol, _ = board.win()
+            # The side to move has lost if the other side won
+            outcome = Outcome.Draw if symbol is None else Outcome.Loss
+            self.send(f"info outcome {outcome.name} bestmoves")
+        elif self.tablebase is not None:
+            outcome = self.tablebase.outcome(board)
+            slots = " ".join(map(str, self.tablebase.best_slots(board)))
+            self.send(f"info outcome {outcome.name} bestmoves {slots}")
+        else:
+            result = self.engine.search(board)
+            self.send(f"info score {result.score} depth {result.depth} nodes {result.nodes} "
+                      f"bestmoves {result.move}")
+
+    ## The loop
+    commands = ("uci", "isready", "setoption", "ucinewgame", "position", "go", "analyze")
+
+    def handle(self, line: str) -> bool:
+        "Answer one command line. Return False once asked to quit."
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        if command == "quit":
+            return False
+        if command not in self.commands:
+            self.send(f"info string unknown command {command!r}")
+            return True
+        try:
+            getattr(self, command)(args)
+        except (ValueError, KeyError) as exc:
+            # KeyError: a position no game reaches
+            message = exc if isinstance(exc, ValueError) else "the position is unreachable"
+            self.send(f"info string error: {message}")
+        return True
+
+    def run(self, source: TextIO = sys.stdin) -> None:
+        "Answer the commands of the source until it ends or asks to quit."
+        for line in source:
+            if not self.handle(line):
+                break
+
+def main(argv: Optional[list[str]] = None) -> None:
+    "Run the engine process on stdin and stdout."
+    parser = ArgumentParser(description="Answer engine commands on stdin, like UCI.")
+    parser.add_argument("--seed", type=int, help="the seed of the engine's random choices")
+    args = parser.parse_args(argv)
+    EngineProtocol(seed=args.seed).run()
+
+if __name__ == "__main__":
+    main()
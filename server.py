@@ -0,0 +1,326 @@
+"""
+Host many tic-tac-toe games at once over JSON lines, on TCP or a Unix socket.
+
+Each request and response is one JSON object per line. A connection may hold
+any number of sessions, which end with it.
+
+    {"op": "new", "symbol": "X", "level": "Hard"}
+        -> {"ok": true, "session": 1, "board": "---------", "reply": null, "status": "ongoing"}
+    {"op": "move", "session": 1, "slot": 4}
+        -> {"ok": true, "board": "O---X----", "reply": 0, "status": "ongoing"}
+    {"op": "undo", "session": 1}     take back the user's last move and the reply to it
+    {"op": "end", "session": 1}
+    {"op": "stats"}                  active sessions, recent moves per second and move latencies
+
+The status is from the user's point of view: "ongoing", "won", "lost" or "draw";
+finished games also give the winning "combo". Errors give {"ok": false, "error": ...}.
+Every session shares the one memory-mapped CPU database.
+"""
+# File: tictactoe\server.py
+
+from argparse import ArgumentParser
+from collections import deque
+from itertools import count
+from random import Random
+from time import perf_counter, perf_counter_ns
+from typing import Optional
+
+import asyncio
+import json
+
+from tictactoe.core.algorithms import level_slots
+from tictactoe.core.bitboard import BitBoard
+from tictactoe.core.board import Combination
+from tictactoe.core.database import Database, get_database
+from tictactoe.core.enums import *
+from tictactoe.core.stats import percentile
+
+# The number of recent moves kept for the move rate and the latency percentiles
+LATENCY_WINDOW = 10_000
+
+# The status of a game by its outcome, from the user's point of view
+_statuses = {Outcome.Win: "lost", Outcome.Draw: "draw", Outcome.Loss: "won", Outcome.Undetermined: "ongoing"}
+
+class Session(object):
+    """
+    One game hosted by the server: the board, the assignment of symbols and the level.
+    """
+    __slots__ = "board", "assignment", "level"
+
+    def __new__(cls, assignment: Assignment, level: Level):
+        self = object.__new__(cls)
+        self.board = BitBoard()
+        self.assignment = assignment
+        self.level = level
+        return self
+
+    def __init__(self, assignment: Assignment, level: Level):
+        pass
+
+    def status(self) -> tuple[str, Optional[Combination]]:
+        "Return the status of the game, from the user's point of view, and the winning combination."
+        _, combo = self.board.win()
+        return _statuses[self.board.rank(self.assignment)], combo
+
+    def computer_to_move(self) -> bool:
+        "Return if it is the computer's turn."
+        return self.board.turn(self.assignment) is Player.Computer
+
+class Server(object):
+    """
+    The sessions of every connection, the shared database and the move statistics.
+    """
+    __slots__ = "database", "sessions", "rng", "moves", "started", "move_times", "latencies", "_ids"
+
+    def __new__(cls, database: Optional[Database] = None, seed: Optional[int] = None):
+        self = object.__new__(cls)
+        self.database = get_database() if database is None else database
+        self.sessions: dict[int, Session] = {}
+        self.rng = Random(seed)
+        self.moves = 0 # The moves played by the computer
+        self.started = perf_counter()
+        # The time of each recent move by the computer
+        self.move_times: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        # The nanoseconds taken to answer each recent move request
+        self.latencies: deque[int] = deque(maxlen=LATENCY_WINDOW)
+        self._ids = count(1)
+        return self
+
+    def __init__(self, database: Optional[Database] = None, seed: Optional[int] = None):
+        pass
+
+    ## Requests
+    def computer_turn(self, session: Session) -> int:
+        "Play the computer's move in the session and return its slot."
+        slots = level_slots(session.board, session.assignment.computer, session.level, self.database, self.rng)
+        slot = self.rng.choice(slots)
+        session.board.push(slot)
+        self.moves += 1
+        self.move_times.append(perf_counter())
+        return slot
+
+    def _reply(self, session: Session, reply: Optional[int]) -> dict:
+        # The response describing the session after a request
+        status, combo = session.status()
+        response = {"ok": True, "board": repr(session.board), "reply": reply, "status": status}
+        if combo is not None:
+            response["combo"] = list(combo)
+        return response
+
+    def _session(self, request: dict, owned: set[int]) -> Session:
+        # The session of the request, which must belong to the connection
+        session_id = request.get("session")
+        if type(session_id) is not int or session_id not in owned:
+            raise ValueError(f"unknown session {session_id!r}")
+        return self.sessions[session_id]
+
+    def new(self, request: dict, owned: set[int]) -> dict:
+        "Start a session; the computer moves first if the user is O."
+        symbol = request.get("symbol", "X")
+        level = request.get("level", Level.Impossible.name)
+        if type(symbol) is not str or symbol not in Symbol.__members__:
+            raise ValueError(f"invalid symbol {symbol!r}")
+        if type(level) is not str or level not in Level.__members__:
+            raise ValueError(f"invalid level {level!r}")
+        user, level = Symbol[symbol], Level[level]
+        session = Session(Assignment(user), level)
+        session_id = next(self._ids)
+        self.sessions[session_id] = session
+        owned.add(session_id)
+        reply = self.computer_turn(session) if session.computer_to_move() else None
+        return {"session": session_id, **self._reply(session, reply)}
+
+    def move(self, request: dict, owned: set[int]) -> dict:
+        "Play the user's move in a session, then the computer's reply if the game goes on."
+        session = self._session(request, owned)
+        slot = request.get("slot")
+        board = session.board
+        if session.status()[0] != "ongoing":
+            raise ValueError("the game is over")
+        if type(slot) is not int or not 0 <= slot < 9 or board[slot] is not None:
+            raise ValueError(f"slot {slot!r} is not available")
+        start = perf_counter_ns()
+        board.push(slot)
+        reply = None
+        if session.status()[0] == "ongoing":
+            reply = self.computer_turn(session)
+        self.latencies.append(perf_counter_ns() - start)
+        return self._reply(session, reply)
+
+    def undo(self, request: dict, owned: set[int]) -> dict:
+        "Take back the user's last move in a session, and the computer's reply to it."
+        session = self._session(request, owned)
+        board = session.board
+        # The user moved last if it is the computer's turn
+        popped = 1 if session.computer_to_move() else 2
+        if len(board.moves) < popped:
+            raise ValueError("there is no move to undo")
+        for _ in range(popped):
+            board.pop()
+        return self._reply(session, None)
+
+    def end(self, request: dict, owned: set[int]) -> dict:
+        "End a session."
+        self._session(request, owned)
+        owned.discard(request["session"])
+        del self.sessions[request["session"]]
+        return {"ok": True}
+
+    def stats(self, request: Optional[dict] = None, owned: Optional[set[int]] = None) -> dict:
+        """
+        Return the active sessions, the computer's moves per second over its recent moves
+        and the percentiles of the recent move latencies, in microseconds.
+        """
+        now = perf_counter()
+        times = self.move_times
+        # The recent moves are all of them until the window is full
+        since = times[0] if len(times) == times.maxlen else self.started
+        elapsed = now - since
+        latencies = sorted(self.latencies)
+        return {
+            "ok": True,
+            "sessions": len(self.sessions),
+            "moves": self.moves,
+            "moves_per_second": len(times) / elapsed if elapsed > 0 else 0.0,
+            "latency_us": {
+                f"p{round(fraction * 100)}": percentile(latencies, fraction) / 1000
+                for fraction in (0.5, 0.9, 0.99)
+            },
+        }
+
+    def handle(self, line: bytes, owned: set[int]) -> dict:
+        "Return the response to one request line of a connection owning the sessions."
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("the request must be a JSON object")
+            op = request.get("op")
+            if op not in ("new", "move", "undo", "end", "stats"):
+                raise ValueError(f"unknown op {op!r}")
+            return getattr(self, op)(request, owned)
+        # json.JSONDecodeError is a ValueError; TypeError is a field of the wrong type
+        except (ValueError, TypeError) as exc:
+            return {"ok": False, "error": str(exc)}
+
+    ## Connections
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        "Answer the requests of one connection until it closes, then end its sessions."
+        owned: set[int] = set()
+        try:
+            while (line := await _read_line(reader)) != b"":
+                if line is None:
+                    response = {"ok": False, "error": "request too long"}
+                elif not line.strip():
+                    continue
+                else:
+                    response = self.handle(line, owned)
+                writer.write(json.dumps(response, separators=(",", ":")).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                del self.sessions[session_id]
+            writer.close()
+
+    async def report(self, interval: float) -> None:
+        "Print the statistics every interval seconds."
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            latency = stats["latency_us"]
+            print(f"{stats['sessions']} sessions, {stats['moves_per_second']:,.0f} moves/s, "
+                  f"latency p50 {latency['p50']:.1f} us, p90 {latency['p90']:.1f} us, "
+                  f"p99 {latency['p99']:.1f} us", flush=True)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765,
+                    unix: Optional[str] = None) -> asyncio.AbstractServer:
+        "Start listening on the Unix socket path, if provided, else on the host and port."
+        if unix is not None:
+            return await asyncio.start_unix_server(self.serve_connection, unix)
+        return await asyncio.start_server(self.serve_connection, host, port)
+
+async def _read_line(reader: asyncio.StreamReader) -> Optional[bytes]:
+    # Return the next line of the reader: b"" once it ends, or None for a line
+    # over the reader's limit, which is skipped so the next line can be read
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as exc:
+        # The last line, without its newline
+        return exc.partial
+    except asyncio.LimitOverrunError as exc:
+        consumed = exc.consumed
+    # Drop the line a limit's worth at a time, up to and including its newline
+    while True:
+        try:
+            await reader.readexactly(consumed)
+            await reader.readuntil(b"\n")
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as exc:
+            consumed = exc.consumed
+
+class Client(object):
+    """
+    A connection to the server, sending one request at a time.
+    """
+    __slots__ = "reader", "writer"
+
+    def __new__(cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self = object.__new__(cls)
+        self.reader = reader
+        self.writer = writer
+        return self
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        pass
+
+    @classmethod
+    async def connect(cls, host: str = "127.0.0.1", port: int = 8765, unix: Optional[str] = None):
+        "Connect to the Unix socket path, if provided, else to the host and port."
+        if unix is not None:
+            return cls(*await asyncio.open_unix_connection(unix))
+        return cls(*await asyncio.open_connection(host, port))
+
+    async def request(self, op: str, **fields) -> dict:
+        "Send a request and return the response."
+        self.writer.write(json.dumps({"op": op, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+
+async def serve(host: str, port: int, unix: Optional[str], interval: float, seed: Optional[int]) -> None:
+    "Run the server until cancelled."
+    server = Server(seed=seed)
+    listener = await server.start(host, port, unix)
+    print(f"Serving on {unix or f'{host}:{port}'}", flush=True)
+    async with listener:
+        # Keep a reference to the task, so it is not garbage collected
+        reporter = asyncio.create_task(server.report(interval)) if interval > 0 else None
+        try:
+            await listener.serve_forever()
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+
+def main(argv: Optional[list[str]] = None) -> None:
+    "Run the server from the command line."
+    parser = ArgumentParser(description="Host tic-tac-toe games over JSON lines.")
+    parser.add_argument("--host", default="127.0.0.1", help="the address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="the TCP port to listen on")
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--report", type=float, default=10.0, metavar="SECONDS",
+                        help="print the statistics this often (0 for never)")
+    parser.add_argument("--seed", type=int, help="the seed of the computer's random choices")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix, args.report, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
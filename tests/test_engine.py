@@ -0,0 +1,30 @@
+"Tests for the alpha-beta engine's evaluation."
+# File: tictactoe\tests\test_engine.py
+
+from random import Random
+
+import pytest
+
+from tictactoe.core.engine import AlphaBetaEngine
+from tictactoe.core.mnk import VARIANTS, MNKBoard
+
+_swapped = str.maketrans("XO", "OX")
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_empty_board_evaluates_to_zero(variant):
+    assert AlphaBetaEngine().evaluate(MNKBoard(*VARIANTS[variant])) == 0
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_colour_swapped_positions_evaluate_symmetrically(variant):
+    rows, columns, k = VARIANTS[variant]
+    engine = AlphaBetaEngine()
+    rng = Random(0)
+    for _ in range(200):
+        # As many Xs as Os, so X is to move on both the board and its colour swap
+        pieces = rng.randrange(0, rows * columns // 2 + 1, 2)
+        cells = ["X", "O"] * (pieces // 2) + ["-"] * (rows * columns - pieces)
+        rng.shuffle(cells)
+        text = "".join(cells)
+        board = MNKBoard.from_string(text, rows, columns, k)
+        swapped = MNKBoard.from_string(text.translate(_swapped), rows, columns, k)
+        assert engine.evaluate(board) == -engine.evaluate(swapped)
@@ -0,0 +1,48 @@
+"Tests for the JSON-lines game server."
+# File: tictactoe\tests\test_server.py
+
+import asyncio
+import json
+
+from tictactoe.server import Client, Server
+
+def _run(tmp_path, scenario):
+    # Run the scenario with a client connected to a new server on a Unix socket
+    async def main():
+        server = Server(seed=0)
+        path = str(tmp_path / "server.sock")
+        listener = await server.start(unix=path)
+        client = await Client.connect(unix=path)
+        try:
+            return await scenario(server, client)
+        finally:
+            await client.close()
+            listener.close()
+            await listener.wait_closed()
+    return asyncio.run(main())
+
+def test_oversized_line_is_answered_and_keeps_the_connection(tmp_path):
+    async def scenario(server, client):
+        session = (await client.request("new", symbol="X"))["session"]
+        responses = []
+        # Over the 64 KiB limit, with the newline found past it, then with more after it
+        for size in (70_000, 300_000):
+            client.writer.write(json.dumps({"op": "stats", "pad": "x" * size}).encode() + b"\n")
+            await client.writer.drain()
+            responses.append(json.loads(await client.reader.readline()))
+        responses.append(await client.request("move", session=session, slot=4))
+        return responses, len(server.sessions)
+
+    responses, sessions = _run(tmp_path, scenario)
+    assert responses[0] == {"ok": False, "error": "request too long"}
+    assert responses[1] == {"ok": False, "error": "request too long"}
+    assert responses[2]["ok"] and responses[2]["board"][4] == "X"
+    assert sessions == 1
+
+def test_wrong_typed_fields_are_answered(tmp_path):
+    async def scenario(server, client):
+        return [await client.request("new", level=["x"]),
+                await client.request("move", session=[1], slot=4)]
+
+    for response in _run(tmp_path, scenario):
+        assert response["ok"] is False